@@ -1,11 +1,94 @@
 import os
+from typing import Dict, Literal, Tuple
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
+RATE_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """Parse a policy like "10/minute" into (capacity, tokens refilled per second)."""
+    count, _, period = rate.partition("/")
+    try:
+        capacity = int(count)
+    except ValueError:
+        capacity = 0
+    seconds = RATE_PERIODS.get(period.strip().lower())
+    if capacity < 1 or seconds is None:
+        raise ValueError(
+            f"Invalid rate {rate!r}, expected <count>/<{'|'.join(RATE_PERIODS)}> with a count of at least 1"
+        )
+    return capacity, capacity / seconds
+
+# Every policy used by a rate_limit() route dependency
+DEFAULT_RATE_LIMITS = {
+    "login": "10/minute",
+    "register": "5/minute",
+    "create_link": "30/minute",
+}
+
 class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
     DATABASE_URL: str = "sqlite:///./linkvault.db"
+
+    # Storage profile, see STORAGE_PROFILES in app/core/database.py
+    STORAGE_PROFILE: Literal["default", "production"] = "default"
+    SQLITE_PRAGMAS: Dict[str, str] = {}  # overrides on top of the profile
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+
+    # Sharded storage, DATABASE_URL then only holds the users directory
+    SHARDING_ENABLED: bool = False
+    SHARD_COUNT: int = 4
+    SHARD_DATABASE_URL: str = "sqlite:///./linkvault_shard_{shard}.db"
+
+    # Cache of user records for authenticated requests
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_TTL: int = 60  # seconds
+
+    # Response compression
+    COMPRESSION_MINIMUM_SIZE: int = 500  # bytes, smaller bodies are sent uncompressed
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Background metadata refresh
+    METADATA_REFRESH_ENABLED: bool = True
+    METADATA_REFRESH_INTERVAL: int = 300  # seconds between runs
+    METADATA_REFRESH_BATCH_SIZE: int = 50  # max links re-fetched per run
+    METADATA_REFRESH_CONCURRENCY: int = 4  # parallel outbound fetches
+    METADATA_REFRESH_TIME_BUDGET: int = 60  # seconds, no new fetches start after this
+    METADATA_REFRESH_LEASE: int = 300  # seconds a run holds its batch, longer than the time budget plus a fetch
+    METADATA_MAX_AGE_DAYS: int = 30  # successful metadata older than this is refreshed
+    METADATA_RETRY_BASE: int = 300  # seconds, doubled after each failed attempt
+    METADATA_RETRY_MAX: int = 86400
+
+    # Public section snapshots
+    PUBLIC_SNAPSHOT_HTML: bool = True  # also pre-render an HTML page
+    PUBLIC_SNAPSHOT_MAX_AGE: int = 3600  # Cache-Control max-age in seconds
+    PUBLIC_SNAPSHOT_STALE_WHILE_REVALIDATE: int = 86400
+
+    # Rate limiting, policies are "<count>/<second|minute|hour|day>" per user or IP
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMITS: Dict[str, str] = DEFAULT_RATE_LIMITS  # overrides are merged into the defaults
+
+    # Load shedding, low priority routes get a 503 past these thresholds
+    LOAD_SHED_ENABLED: bool = True
+    LOAD_SHED_MAX_LAG_MS: int = 200
+    LOAD_SHED_MAX_IN_FLIGHT: int = 100
+    LOAD_SHED_RETRY_AFTER: int = 5  # seconds
+
+    @field_validator("RATE_LIMITS")
+    @classmethod
+    def merge_rate_limits(cls, value: Dict[str, str]) -> Dict[str, str]:
+        unknown = sorted(set(value) - set(DEFAULT_RATE_LIMITS))
+        if unknown:
+            raise ValueError(f"Unknown rate limit policies: {', '.join(unknown)}")
+        for rate in value.values():
+            parse_rate(rate)
+        return {**DEFAULT_RATE_LIMITS, **value}
     
     class Config:
         env_file = ".env"
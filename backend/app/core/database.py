@@ -1,9 +1,109 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# PRAGMAs applied to every new SQLite connection, per STORAGE_PROFILE
+STORAGE_PROFILES = {
+    # SQLite defaults: rollback journal, synchronous=FULL, no busy timeout
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",  # safe with WAL, only the last commits can be lost on power failure
+        "busy_timeout": 5000,  # ms to wait for a lock instead of failing with "database is locked"
+        "mmap_size": 268435456,  # 256 MiB
+        "cache_size": -65536,  # negative means KiB, so 64 MiB per connection
+        "temp_store": "MEMORY",
+    },
+}
 
-Base = declarative_base()
\ No newline at end of file
+def sqlite_pragmas() -> dict:
+    return {**STORAGE_PROFILES[settings.STORAGE_PROFILE], **settings.SQLITE_PRAGMAS}
+
+def make_engine(url: str, read_only: bool = False):
+    """Create an engine with the configured storage profile applied to each connection."""
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    database = make_url(url).database
+    if database and database != ":memory:":
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    new_engine = create_engine(url, **kwargs)
+
+    pragmas = sqlite_pragmas()
+    if read_only:
+        pragmas["query_only"] = "ON"
+
+    if pragmas:
+        @event.listens_for(new_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+    return new_engine
+
+engine = make_engine(settings.DATABASE_URL)
+read_engine = make_engine(settings.DATABASE_URL, read_only=True)
+
+if settings.SHARDING_ENABLED:
+    # DATABASE_URL only holds the users directory, sections and links live on the shards
+    from app.core.sharding import ShardRouter
+
+    shard_urls = [settings.SHARD_DATABASE_URL.format(shard=i) for i in range(settings.SHARD_COUNT)]
+    shard_router = ShardRouter(engine, [make_engine(url) for url in shard_urls])
+    read_shard_router = ShardRouter(read_engine, [make_engine(url, read_only=True) for url in shard_urls])
+    SessionLocal = shard_router.sessionmaker()
+    ReadSessionLocal = read_shard_router.sessionmaker()
+else:
+    shard_router = None
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # Sessions for GET handlers, their connections refuse writes
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+Base = declarative_base()
+
+def bind_arguments_for_user(user_id: int) -> dict:
+    """bind_arguments for Core statements that only touch one user's rows."""
+    return shard_router.bind_arguments(user_id) if shard_router else {}
+
+# Columns added to existing tables since the first release. create_all() only
+# creates missing tables, so create_tables() adds these to older databases.
+ADDED_COLUMNS = {
+    "users": ("shard",),
+    "links": (
+        "metadata_status", "metadata_fetched_at", "metadata_attempts", "metadata_next_attempt_at",
+    ),
+}
+
+def add_missing_columns(bind, metadata) -> None:
+    """ALTER TABLE ... ADD COLUMN for every ADDED_COLUMNS entry the database lacks. Idempotent."""
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table_name, column_names in ADDED_COLUMNS.items():
+            if not inspector.has_table(table_name):
+                continue
+            table = metadata.tables[table_name]
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            for name in column_names:
+                if name in existing:
+                    continue
+                column_type = table.c[name].type.compile(dialect=bind.dialect)
+                conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type}"))
+                for index in table.indexes:
+                    if name in index.columns:
+                        index.create(conn, checkfirst=True)
+
+def create_tables():
+    if shard_router:
+        shard_router.create_all(Base.metadata)
+        binds = [shard_router.directory_engine, *shard_router.shard_engines.values()]
+    else:
+        Base.metadata.create_all(bind=engine)
+        binds = [engine]
+    for bind in binds:
+        add_missing_columns(bind, Base.metadata)
@@ -0,0 +1,52 @@
+from typing import Dict
+from fastapi import Depends, HTTPException, Request
+from app.core.database import SessionLocal, ReadSessionLocal
+from app.core.user_cache import user_cache
+from app.crud import crud_user
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_current_user_record(request: Request) -> Dict:
+    """
+    The logged-in user's record, from the user cache when possible.
+    A plain def so FastAPI runs the users query of a cache miss in its threadpool.
+    """
+    user_id = request.session.get('user_id')
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    record = user_cache.get(user_id)
+    if record is None:
+        db = ReadSessionLocal()
+        try:
+            user = crud_user.get_user(db, user_id=user_id)
+        finally:
+            db.close()
+        if not user:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        record = {
+            "id": user.id,
+            "email": user.email,
+            "name": user.name,
+            "is_active": user.is_active is not False,
+        }
+        user_cache.set(user_id, record)
+
+    if not record["is_active"]:
+        raise HTTPException(status_code=403, detail="Account is inactive")
+    return record
+
+async def get_current_user(user: Dict = Depends(get_current_user_record)) -> int:
+    return user["id"]
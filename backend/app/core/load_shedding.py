@@ -0,0 +1,43 @@
+import asyncio
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import settings
+
+class LoadMonitor:
+    """Tracks event loop lag and the number of requests currently being handled."""
+
+    def __init__(self):
+        self.loop_lag = 0.0  # seconds
+        self.in_flight = 0
+
+    def overloaded(self) -> bool:
+        return (
+            self.loop_lag * 1000 > settings.LOAD_SHED_MAX_LAG_MS
+            or self.in_flight > settings.LOAD_SHED_MAX_IN_FLIGHT
+        )
+
+    async def watch_event_loop(self, interval: float = 0.5):
+        """Measure how late a sleep wakes up; a busy loop wakes up late."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.loop_lag = max(0.0, loop.time() - start - interval)
+
+load_monitor = LoadMonitor()
+
+class InFlightMiddleware:
+    """Counts in-flight HTTP requests for the load monitor."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        load_monitor.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            load_monitor.in_flight -= 1
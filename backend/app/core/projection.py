@@ -0,0 +1,24 @@
+from typing import Optional, Sequence, Tuple
+from fastapi import HTTPException
+
+def resolve_fields(
+    fields: Optional[str],
+    compact: bool,
+    allowed: Sequence[str],
+    compact_fields: Sequence[str],
+) -> Optional[Tuple[str, ...]]:
+    """
+    Turn the fields= / compact= query params into a tuple of column names.
+    Returns None when the full record was requested.
+    """
+    if fields:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = sorted(requested - set(allowed))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # Always include the id so clients can still address the records
+        requested.add("id")
+        return tuple(field for field in allowed if field in requested)
+    if compact:
+        return tuple(compact_fields)
+    return None
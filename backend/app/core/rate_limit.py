@@ -0,0 +1,107 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+from fastapi import HTTPException, Request
+from app.core.config import parse_rate, settings
+from app.core.load_shedding import load_monitor
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token buckets. Subclass this to share buckets across workers
+    (e.g. Redis); the in-process backend only sees requests to its own worker.
+    """
+
+    @abstractmethod
+    def take(self, key: str, capacity: int, refill_rate: float) -> float:
+        """Take one token from the bucket. Returns 0 if allowed, else seconds until a token is free."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Empty every bucket."""
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, last update)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, refill_rate: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / refill_rate
+            if len(self._buckets) > self.max_keys:
+                self._prune()
+        return wait
+
+    def _prune(self) -> None:
+        # Drop the buckets that have been idle longest, they have refilled anyway
+        by_age = sorted(self._buckets.items(), key=lambda item: item[1][1])
+        for key, _ in by_age[:len(by_age) - self.max_keys // 2]:
+            del self._buckets[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+BACKENDS = {
+    "memory": InMemoryRateLimitBackend,
+}
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, policies: Dict[str, str]):
+        self.backend = backend
+        self.policies = {name: parse_rate(rate) for name, rate in policies.items()}
+
+    def hit(self, policy: str, key: str) -> float:
+        """
+        Count one request against a policy. Returns 0 if allowed, else the
+        Retry-After in seconds. Policies without a configured rate are unlimited.
+        """
+        if policy not in self.policies:
+            return 0.0
+        capacity, refill_rate = self.policies[policy]
+        return self.backend.take(f"{policy}:{key}", capacity, refill_rate)
+
+limiter = RateLimiter(BACKENDS[settings.RATE_LIMIT_BACKEND](), settings.RATE_LIMITS)
+
+def client_key(request: Request) -> str:
+    """Rate limit by user when logged in, otherwise by client IP."""
+    user_id = request.session.get('user_id')
+    if user_id:
+        return f"user:{user_id}"
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}"
+
+def rate_limit(policy: str, low_priority: bool = False):
+    """
+    Dependency enforcing a RATE_LIMITS policy on a route.
+    Low priority routes are also rejected while the server is overloaded.
+    """
+    async def dependency(request: Request):
+        if low_priority and settings.LOAD_SHED_ENABLED and load_monitor.overloaded():
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, try again shortly",
+                headers={"Retry-After": str(settings.LOAD_SHED_RETRY_AFTER)},
+            )
+
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        retry_after = limiter.hit(policy, client_key(request))
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return dependency
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList, Grouping
+
+DIRECTORY = "directory"
+DIRECTORY_TABLES = ("users", "section_snapshots")
+
+def shard_name(index: int) -> str:
+    return f"shard_{index}"
+
+class ShardRouter:
+    """
+    Routes sessions between the directory database (users and public section
+    snapshots) and the data shards (sections and links). Users are placed on
+    shard user_id % shard count unless users.shard pins them elsewhere, which
+    is what the rebalance tooling sets.
+    """
+
+    def __init__(self, directory_engine: Engine, shard_engines: List[Engine]):
+        self.directory_engine = directory_engine
+        self.shard_engines = {shard_name(i): e for i, e in enumerate(shard_engines)}
+        self._placements: Dict[int, str] = {}
+
+    def shard_for_user(self, user_id: int) -> str:
+        user_id = int(user_id)
+        shard = self._placements.get(user_id)
+        if shard is None:
+            with self.directory_engine.connect() as conn:
+                pinned = conn.execute(
+                    text("SELECT shard FROM users WHERE id = :id"), {"id": user_id}
+                ).scalar()
+            index = pinned if pinned is not None else user_id % len(self.shard_engines)
+            shard = self._placements[user_id] = shard_name(index)
+        return shard
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Forget cached placements after users are moved between shards."""
+        if user_id is None:
+            self._placements.clear()
+        else:
+            self._placements.pop(int(user_id), None)
+
+    def bind_arguments(self, user_id: int) -> Dict[str, str]:
+        """bind_arguments for Session.execute() of Core statements touching a user's rows."""
+        return {"shard_id": self.shard_for_user(user_id)}
+
+    def create_all(self, metadata) -> None:
+        directory_tables = [t for t in metadata.sorted_tables if t.name in DIRECTORY_TABLES]
+        data_tables = [t for t in metadata.sorted_tables if t.name not in DIRECTORY_TABLES]
+        metadata.create_all(bind=self.directory_engine, tables=directory_tables)
+        for engine in self.shard_engines.values():
+            metadata.create_all(bind=engine, tables=data_tables)
+
+    def sessionmaker(self) -> sessionmaker:
+        shards = {DIRECTORY: self.directory_engine, **self.shard_engines}
+        return sessionmaker(
+            class_=ShardedSession,
+            autocommit=False,
+            autoflush=False,
+            shards=shards,
+            shard_chooser=self.shard_chooser,
+            identity_chooser=self.identity_chooser,
+            execute_chooser=self.execute_chooser,
+        )
+
+    # ShardedSession hooks
+
+    def shard_chooser(self, mapper, instance, clause=None, **kw) -> str:
+        if mapper is None or mapper.local_table.name in DIRECTORY_TABLES:
+            return DIRECTORY
+        if instance is not None and instance.user_id is not None:
+            return self.shard_for_user(instance.user_id)
+        raise ValueError(f"Cannot pick a shard for {mapper.class_.__name__} without a user_id")
+
+    def identity_chooser(self, mapper, primary_key, *, lazy_loaded_from, **kw) -> List[str]:
+        if mapper.local_table.name in DIRECTORY_TABLES:
+            return [DIRECTORY]
+        if lazy_loaded_from is not None and lazy_loaded_from.identity_token != DIRECTORY:
+            return [lazy_loaded_from.identity_token]
+        # Primary keys are only unique within a shard
+        return list(self.shard_engines)
+
+    def execute_chooser(self, orm_context) -> List[str]:
+        mapper = orm_context.bind_mapper
+        if mapper is not None and mapper.local_table.name in DIRECTORY_TABLES:
+            return [DIRECTORY]
+        parent = orm_context.lazy_loaded_from if orm_context.is_select else None
+        if parent is not None and parent.identity_token not in (None, DIRECTORY):
+            # Relationship loads stay on the parent row's shard
+            return [parent.identity_token]
+        user_ids = _user_ids_in_criteria(orm_context.statement, orm_context.parameters)
+        if user_ids:
+            return sorted({self.shard_for_user(user_id) for user_id in user_ids})
+        # No user_id filter (e.g. background jobs), fan out to every shard
+        return list(self.shard_engines)
+
+def _user_ids_in_criteria(statement, parameters=None) -> set:
+    """
+    user_id values the WHERE clause restricts the statement to, from user_id ==
+    value or user_id IN (...) in its top-level AND. Any other shape (OR, a join
+    on user_id, no filter) gives an empty set, which means every shard.
+    Bind values may arrive in the execute() parameters, as lazy loads pass them.
+    """
+    if not isinstance(parameters, dict):
+        parameters = {}
+    whereclause = getattr(statement, "whereclause", None)
+    if whereclause is None:
+        return set()
+    user_ids = None
+    for criterion in _conjuncts(whereclause):
+        values = _user_id_values(criterion, parameters)
+        if values is not None:
+            user_ids = values if user_ids is None else user_ids & values
+    return user_ids or set()
+
+def _conjuncts(clause):
+    while isinstance(clause, Grouping):
+        clause = clause.element
+    if isinstance(clause, BooleanClauseList) and clause.operator is operators.and_:
+        for child in clause.clauses:
+            yield from _conjuncts(child)
+    else:
+        yield clause
+
+def _user_id_values(criterion, parameters: dict) -> Optional[set]:
+    if not isinstance(criterion, BinaryExpression):
+        return None
+    column, value = criterion.left, criterion.right
+    if criterion.operator is operators.eq and isinstance(column, BindParameter):
+        column, value = value, column
+    if getattr(column, "name", None) != "user_id" or not isinstance(value, BindParameter):
+        return None
+    bound = parameters.get(value.key, value.effective_value)
+    if bound is None:
+        return None
+    if criterion.operator is operators.eq:
+        return {bound}
+    if criterion.operator is operators.in_op:
+        return set(bound)
+    return None
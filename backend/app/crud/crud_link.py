@@ -2,7 +2,22 @@ from sqlalchemy.orm import Session
 from app.models.models import Link
 from app.schemas.schemas import LinkCreate, LinkUpdate
 from app.crud.crud_section import get_uncategorized_section
-from app.services.metadata_service import fetch_website_metadata
+from app.crud.crud_snapshot import refresh_section_snapshots
+from app.core.database import bind_arguments_for_user
+from app.services.metadata_service import fetch_website_metadata, metadata_fetch_state
+from sqlalchemy import bindparam, case, func, or_, update
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+# Columns that can be requested with fields= / compact=true
+LINK_FIELDS = (
+    "id", "title", "url", "description", "is_pinned",
+    "user_id", "section_id", "favicon_url", "created_at",
+)
+COMPACT_LINK_FIELDS = ("id", "title", "url", "is_pinned", "section_id")
+METADATA_STATE_FIELDS = (
+    "metadata_status", "metadata_fetched_at", "metadata_attempts", "metadata_next_attempt_at",
+)
 
 def get_links(db: Session, user_id: int):
     return db.query(Link).filter(Link.user_id == user_id).all()
@@ -13,6 +28,12 @@ def get_link(db: Session, link_id: int, user_id: int):
 def get_pinned_links(db: Session, user_id: int):
     return db.query(Link).filter(Link.user_id == user_id, Link.is_pinned == True).all()
 
+def get_link_fields(db: Session, user_id: int, fields: Sequence[str]):
+    """Select only the given columns of a user's links, returned as plain dicts."""
+    columns = [getattr(Link, field) for field in fields]
+    query = db.query(*columns).filter(Link.user_id == user_id)
+    return [row._asdict() for row in query.order_by(Link.id).all()]
+
 def create_link(db: Session, link: LinkCreate, user_id: int):
     # If no section specified, use Uncategorized
     section_id = link.section_id
@@ -49,22 +70,32 @@ def create_link(db: Session, link: LinkCreate, user_id: int):
         favicon_url=favicon_url,
         is_pinned=link.is_pinned,
         user_id=user_id,
-        section_id=section_id
+        section_id=section_id,
+        **metadata_fetch_state(metadata["error"])
     )
     db.add(db_link)
     db.commit()
     db.refresh(db_link)
+    refresh_section_snapshots(db, user_id, [db_link.section_id])
     return db_link
 
 def update_link(db: Session, link_id: int, link_update: LinkUpdate, user_id: int):
     db_link = get_link(db, link_id, user_id)
     if not db_link:
         return None
+    old_section_id = db_link.section_id
     
     if link_update.title is not None:
         db_link.title = link_update.title
-    if link_update.url is not None:
+    if link_update.url is not None and link_update.url != db_link.url:
+        # Title still showing the old raw URL follows the new one until metadata arrives
+        if link_update.title is None and db_link.title.strip() == db_link.url.strip():
+            db_link.title = link_update.url
         db_link.url = link_update.url
+        # Queue the link for the metadata refresh scheduler
+        db_link.metadata_status = "pending"
+        db_link.metadata_attempts = 0
+        db_link.metadata_next_attempt_at = None
     if link_update.description is not None:
         db_link.description = link_update.description
     if link_update.is_pinned is not None:
@@ -74,6 +105,7 @@ def update_link(db: Session, link_id: int, link_update: LinkUpdate, user_id: int
     
     db.commit()
     db.refresh(db_link)
+    refresh_section_snapshots(db, user_id, [old_section_id, db_link.section_id])
     return db_link
 
 def delete_link(db: Session, link_id: int, user_id: int):
@@ -81,6 +113,125 @@ def delete_link(db: Session, link_id: int, user_id: int):
     if not db_link:
         return False
     
+    section_id = db_link.section_id
     db.delete(db_link)
     db.commit()
-    return True
\ No newline at end of file
+    refresh_section_snapshots(db, user_id, [section_id])
+    return True
+
+def get_links_needing_metadata(db: Session, now: datetime, stale_before: datetime, limit: int):
+    """
+    Links due for a metadata re-fetch, across all users, most urgent first:
+    changed URLs, then failed fetches, then stale links still missing a title
+    or favicon, then the remaining stale links. Links backing off from a
+    failed fetch are skipped until their next attempt time.
+    """
+    unfetched = or_(Link.metadata_status == "pending", Link.metadata_status.is_(None))
+    missing = or_(Link.favicon_url.is_(None), Link.title == Link.url)
+    priority = case(
+        (unfetched, 0),
+        (Link.metadata_status == "failed", 1),
+        (missing, 2),
+        else_=3,
+    )
+    rows = db.query(Link, priority.label("priority")).filter(
+        or_(Link.metadata_next_attempt_at.is_(None), Link.metadata_next_attempt_at <= now),
+        or_(
+            unfetched,
+            Link.metadata_status == "failed",
+            Link.metadata_fetched_at.is_(None),
+            Link.metadata_fetched_at < stale_before,
+        ),
+    ).order_by(priority, Link.metadata_fetched_at, Link.id).limit(limit).all()
+    # Sharded sessions return up to limit rows per shard, one shard after the
+    # other; re-apply the ORDER BY above (SQLite sorts NULLs first) across them
+    rows.sort(key=lambda row: (
+        row.priority,
+        row.Link.metadata_fetched_at is not None,
+        row.Link.metadata_fetched_at or datetime.min,
+        row.Link.id,
+    ))
+    return [row.Link for row in rows[:limit]]
+
+def claim_links_for_refresh(db: Session, links: List[Dict], now: datetime, lease_until: datetime) -> set:
+    """
+    Lease links picked by get_links_needing_metadata until lease_until, so the
+    refresh runs of other workers skip them while this one fetches. Each claim
+    re-checks that the link is still due, a link another run leased first is
+    not claimed. Returns the (id, user_id) pairs claimed.
+    """
+    claimed = set()
+    for link in links:
+        count = db.query(Link).filter(
+            Link.id == link["id"],
+            Link.user_id == link["user_id"],
+            or_(Link.metadata_next_attempt_at.is_(None), Link.metadata_next_attempt_at <= now),
+        ).update({Link.metadata_next_attempt_at: lease_until}, synchronize_session=False)
+        if count:
+            claimed.add((link["id"], link["user_id"]))
+    db.commit()
+    return claimed
+
+def get_metadata_attempts_by_url(db: Session, urls: Sequence[str]) -> Dict[str, int]:
+    """Failed fetch count per URL, the highest across every link saving it."""
+    if not urls:
+        return {}
+    attempts: Dict[str, int] = {}
+    rows = db.query(Link.url, func.max(Link.metadata_attempts)).filter(
+        Link.url.in_(urls)
+    ).group_by(Link.url).all()
+    # Sharded sessions return one row per URL per shard
+    for url, count in rows:
+        attempts[url] = max(attempts.get(url, 0), count or 0)
+    return attempts
+
+def bulk_update_link_metadata(db: Session, updates: List[Dict]):
+    """
+    Write refreshed metadata back with executemany UPDATEs, one per shard.
+    Each dict carries b_id, b_user_id and b_url, the fetched m_title,
+    m_description and m_favicon_url (None when not found), plus the metadata_*
+    bookkeeping columns. Links whose URL was edited while the fetch was in
+    flight are left untouched, and the title and description are only filled
+    in SQL when they are still the raw URL or empty, so a user's edit made
+    during the fetch is never overwritten.
+    """
+    if not updates:
+        return
+    table = Link.__table__
+    stmt = update(table).where(
+        table.c.id == bindparam("b_id"),
+        table.c.user_id == bindparam("b_user_id"),
+        table.c.url == bindparam("b_url"),
+    ).values(
+        title=case(
+            (func.trim(table.c.title) == func.trim(table.c.url),
+             func.coalesce(bindparam("m_title"), table.c.title)),
+            else_=table.c.title,
+        ),
+        description=case(
+            (or_(table.c.description.is_(None), table.c.description == ""),
+             func.coalesce(bindparam("m_description"), table.c.description)),
+            else_=table.c.description,
+        ),
+        favicon_url=func.coalesce(bindparam("m_favicon_url"), table.c.favicon_url),
+    )
+    by_shard = {}
+    for row in updates:
+        bind_arguments = bind_arguments_for_user(row["b_user_id"])
+        by_shard.setdefault(bind_arguments.get("shard_id"), (bind_arguments, []))[1].append(row)
+    for bind_arguments, rows in by_shard.values():
+        db.execute(stmt, rows, bind_arguments=bind_arguments)
+
+    # Backoff is per URL: push a failed fetch's schedule onto every other link
+    # with that URL still waiting for metadata, on whichever shard it lives
+    failed = {row["b_url"]: row for row in updates if row["metadata_status"] == "failed"}
+    if failed:
+        backoff = update(table).where(
+            table.c.url == bindparam("b_url"),
+            or_(table.c.metadata_status.is_(None), table.c.metadata_status != "ok"),
+        )
+        db.execute(backoff, [
+            {key: row[key] for key in ("b_url", *METADATA_STATE_FIELDS)}
+            for row in failed.values()
+        ])
+    db.commit()
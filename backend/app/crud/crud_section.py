@@ -2,11 +2,22 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models.models import Section, Link
 from app.schemas.schemas import SectionCreate, SectionUpdate
-from typing import List
+from app.crud.crud_snapshot import refresh_section_snapshots, unpublish_section
+from typing import List, Sequence
+
+# Columns that can be requested with fields= / compact=true
+SECTION_FIELDS = ("id", "name", "order", "user_id", "created_at")
+COMPACT_SECTION_FIELDS = ("id", "name", "order")
 
 def get_sections(db: Session, user_id: int):
     return db.query(Section).filter(Section.user_id == user_id).order_by(Section.order).all()
 
+def get_section_fields(db: Session, user_id: int, fields: Sequence[str]):
+    """Select only the given columns of a user's sections, returned as plain dicts."""
+    columns = [getattr(Section, field) for field in fields]
+    query = db.query(*columns).filter(Section.user_id == user_id).order_by(Section.order)
+    return [row._asdict() for row in query.all()]
+
 def get_section(db: Session, section_id: int, user_id: int):
     return db.query(Section).filter(Section.id == section_id, Section.user_id == user_id).first()
 
@@ -43,6 +54,7 @@ def update_section(db: Session, section_id: int, section_update: SectionUpdate,
     
     db.commit()
     db.refresh(db_section)
+    refresh_section_snapshots(db, user_id, [section_id])
     return db_section
 
 def delete_section(db: Session, section_id: int, user_id: int):
@@ -56,10 +68,15 @@ def delete_section(db: Session, section_id: int, user_id: int):
     
     # Move all links to Uncategorized before deleting
     uncategorized = get_uncategorized_section(db, user_id)
-    db.query(Link).filter(Link.section_id == section_id).update({"section_id": uncategorized.id})
+    db.query(Link).filter(
+        Link.user_id == user_id,
+        Link.section_id == section_id
+    ).update({"section_id": uncategorized.id})
     
     db.delete(db_section)
     db.commit()
+    unpublish_section(db, section_id, user_id)
+    refresh_section_snapshots(db, user_id, [uncategorized.id])
     return True
 
 def reorder_sections(db: Session, section_orders: List[dict], user_id: int):
@@ -0,0 +1,81 @@
+import secrets
+from typing import Iterable, Optional
+from sqlalchemy.orm import Session
+from app.models.models import Link, Section, SectionSnapshot
+from app.services.snapshot_service import render_section
+
+def get_snapshot_by_slug(db: Session, slug: str):
+    return db.query(SectionSnapshot).filter(SectionSnapshot.slug == slug).first()
+
+def get_section_snapshot(db: Session, section_id: int, user_id: int):
+    return db.query(SectionSnapshot).filter(
+        SectionSnapshot.user_id == user_id,
+        SectionSnapshot.section_id == section_id
+    ).first()
+
+def get_section_links(db: Session, section: Section):
+    """The section's links as the plain dicts snapshots are rendered from."""
+    links = db.query(Link.title, Link.url, Link.description, Link.favicon_url).filter(
+        Link.user_id == section.user_id,
+        Link.section_id == section.id
+    ).order_by(Link.id).all()
+    return [link._asdict() for link in links]
+
+def apply_render(db: Session, snapshot: SectionSnapshot, section: Section) -> bool:
+    """Re-render into snapshot. Returns False when the content did not change."""
+    rendered = render_section(section.name, get_section_links(db, section))
+    if rendered["etag"] == snapshot.etag and rendered["content_html"] == snapshot.content_html:
+        return False
+    snapshot.content_json = rendered["content_json"]
+    snapshot.content_html = rendered["content_html"]
+    snapshot.etag = rendered["etag"]
+    return True
+
+def publish_section(db: Session, section: Section):
+    """Create (or re-render) the public snapshot of a section."""
+    snapshot = get_section_snapshot(db, section.id, section.user_id)
+    if not snapshot:
+        snapshot = SectionSnapshot(
+            slug=secrets.token_urlsafe(12),
+            user_id=section.user_id,
+            section_id=section.id,
+        )
+        db.add(snapshot)
+    apply_render(db, snapshot, section)
+    db.commit()
+    db.refresh(snapshot)
+    return snapshot
+
+def unpublish_section(db: Session, section_id: int, user_id: int) -> bool:
+    snapshot = get_section_snapshot(db, section_id, user_id)
+    if not snapshot:
+        return False
+    db.delete(snapshot)
+    db.commit()
+    return True
+
+def refresh_section_snapshots(db: Session, user_id: int, section_ids: Iterable[Optional[int]]):
+    """
+    Re-render the snapshots of published sections among section_ids.
+    Called after writes; unpublished sections cost one indexed lookup.
+    """
+    section_ids = {section_id for section_id in section_ids if section_id is not None}
+    if not section_ids:
+        return
+    snapshots = db.query(SectionSnapshot).filter(
+        SectionSnapshot.user_id == user_id,
+        SectionSnapshot.section_id.in_(section_ids)
+    ).all()
+    if not snapshots:
+        return
+
+    changed = False
+    for snapshot in snapshots:
+        section = db.query(Section).filter(
+            Section.id == snapshot.section_id,
+            Section.user_id == user_id
+        ).first()
+        if section:
+            changed = apply_render(db, snapshot, section) or changed
+    if changed:
+        db.commit()
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from app.models.models import User, Section
 from app.schemas.schemas import UserCreate
 from app.core.security import hash_password, verify_password
+from app.core.user_cache import user_cache
 
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
@@ -38,6 +39,25 @@ def create_user(db: Session, user: UserCreate):
     
     return db_user
 
+def link_google_account(db: Session, user: User, google_id: str, name: str):
+    """Attach a Google account to an existing user, taking the name from Google."""
+    user.google_id = google_id
+    user.name = name
+    db.commit()
+    db.refresh(user)
+    user_cache.invalidate(user.id)
+    return user
+
+def set_user_active(db: Session, user_id: int, is_active: bool):
+    user = get_user(db, user_id)
+    if not user:
+        return None
+    user.is_active = is_active
+    db.commit()
+    db.refresh(user)
+    user_cache.invalidate(user.id)
+    return user
+
 def authenticate_user(db: Session, email: str, password: str):
     """Authenticate user with email and password."""
     user = get_user_by_email(db, email)
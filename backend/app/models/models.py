@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -12,6 +12,7 @@ class User(Base):
     google_id = Column(String, unique=True, index=True, nullable=True)  # Now nullable
     password_hash = Column(String, nullable=True)  # For email/password auth
     is_active = Column(Boolean, default=True)
+    shard = Column(Integer, nullable=True)  # Pinned shard when sharded, None means user_id % SHARD_COUNT
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     sections = relationship("Section", back_populates="user", cascade="all, delete-orphan")
@@ -42,5 +43,26 @@ class Link(Base):
     favicon_url = Column(String(500))  
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Metadata refresh bookkeeping
+    metadata_status = Column(String(20), default="pending", index=True)  # pending, ok, failed
+    metadata_fetched_at = Column(DateTime(timezone=True), nullable=True)
+    metadata_attempts = Column(Integer, default=0)
+    metadata_next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    
     user = relationship("User", back_populates="links")
-    section = relationship("Section", back_populates="links")
\ No newline at end of file
+    section = relationship("Section", back_populates="links")
+
+class SectionSnapshot(Base):
+    """Pre-rendered public copy of a published section, served at /public/{slug}."""
+    __tablename__ = "section_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    slug = Column(String(32), unique=True, index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    section_id = Column(Integer, nullable=False)  # No FK, sections may live on another shard
+    content_json = Column(Text, nullable=False)
+    content_html = Column(Text, nullable=True)
+    etag = Column(String(80), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (Index("ix_section_snapshots_user_section", "user_id", "section_id", unique=True),)
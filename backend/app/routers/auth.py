@@ -1,20 +1,14 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.deps import get_db
+from app.core.rate_limit import rate_limit
 from app.crud import crud_user
 from app.schemas.schemas import UserCreate, UserLogin
 from urllib.parse import urlencode
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/login")
 async def login(request: Request):
     oauth = request.app.state.oauth
@@ -49,10 +43,7 @@ async def callback(request: Request, db: Session = Depends(get_db)):
         
         if user:
             # User exists with this email - link Google account to existing user
-            user.google_id = user_info['sub']
-            user.name = user_info['name']  # Update name from Google if different
-            db.commit()
-            db.refresh(user)
+            user = crud_user.link_google_account(db, user, user_info['sub'], user_info['name'])
             
             # Login the existing user
             request.session['user_id'] = user.id
@@ -75,7 +66,7 @@ async def callback(request: Request, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Authentication failed: {str(e)}")
 
-@router.post("/register")
+@router.post("/register", dependencies=[Depends(rate_limit("register", low_priority=True))])
 async def register(user_data: UserCreate, request: Request, db: Session = Depends(get_db)):
     # Check if user already exists
     existing_user = crud_user.get_user_by_email(db, user_data.email)
@@ -95,7 +86,7 @@ async def register(user_data: UserCreate, request: Request, db: Session = Depend
     except Exception as e:
         raise HTTPException(status_code=400, detail="Failed to create user")
 
-@router.post("/login-email")
+@router.post("/login-email", dependencies=[Depends(rate_limit("login"))])
 async def login_email(login_data: UserLogin, request: Request, db: Session = Depends(get_db)):
     user = crud_user.authenticate_user(db, login_data.email, login_data.password)
     if not user:
@@ -1,42 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import SessionLocal
+from typing import List, Optional
+from app.core.deps import get_db, get_read_db, get_current_user
+from app.core.projection import resolve_fields
+from app.core.rate_limit import rate_limit
 from app.crud import crud_link, crud_section
 from app.schemas.schemas import Link, LinkCreate, LinkUpdate, DashboardResponse, SectionWithLinks
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(request: Request):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    return user_id
+def resolve_link_fields(fields: Optional[str], compact: bool):
+    return resolve_fields(fields, compact, crud_link.LINK_FIELDS, crud_link.COMPACT_LINK_FIELDS)
 
 @router.get("/", response_model=List[Link])
 async def get_links(
-    request: Request,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    compact: bool = False,
+    user_id: int = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
-    user_id = get_current_user(request)
+    link_fields = resolve_link_fields(fields, compact)
+    if link_fields:
+        # Projected rows skip the response model, only the selected columns are sent
+        rows = crud_link.get_link_fields(db, user_id, link_fields)
+        return JSONResponse(content=jsonable_encoder(rows))
     return crud_link.get_links(db, user_id)
 
 @router.get("/dashboard", response_model=DashboardResponse)
 async def get_dashboard(
-    request: Request,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    compact: bool = False,
+    user_id: int = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
-    user_id = get_current_user(request)
+    link_fields = resolve_link_fields(fields, compact)
+    if link_fields:
+        return JSONResponse(content=jsonable_encoder(
+            build_projected_dashboard(db, user_id, link_fields, compact)
+        ))
     
-    # Get pinned links
-    pinned_links = crud_link.get_pinned_links(db, user_id)
+    # One links query for the whole dashboard instead of lazy-loading each section
+    pinned_links = []
+    links_by_section = {}
+    for link in crud_link.get_links(db, user_id):
+        if link.is_pinned:
+            pinned_links.append(link)
+        else:
+            links_by_section.setdefault(link.section_id, []).append(link)
     
     # Get sections with their links
     sections = crud_section.get_sections(db, user_id)
@@ -49,7 +61,7 @@ async def get_dashboard(
             "order": section.order,
             "user_id": section.user_id,
             "created_at": section.created_at,
-            "links": [link for link in section.links if not link.is_pinned]
+            "links": links_by_section.get(section.id, [])
         }
         sections_with_links.append(section_dict)
     
@@ -58,23 +70,47 @@ async def get_dashboard(
         "sections": sections_with_links
     }
 
-@router.post("/", response_model=Link)
+def build_projected_dashboard(db: Session, user_id: int, link_fields, compact: bool = False):
+    """Dashboard payload built from a single projected links query."""
+    # is_pinned and section_id are needed for grouping even if not requested
+    query_fields = [field for field in crud_link.LINK_FIELDS
+                    if field in link_fields or field in ("is_pinned", "section_id")]
+    rows = crud_link.get_link_fields(db, user_id, query_fields)
+
+    pinned_links = []
+    links_by_section = {}
+    for row in rows:
+        link = {field: row[field] for field in link_fields}
+        if row["is_pinned"]:
+            pinned_links.append(link)
+        else:
+            links_by_section.setdefault(row["section_id"], []).append(link)
+
+    section_fields = crud_section.COMPACT_SECTION_FIELDS if compact else crud_section.SECTION_FIELDS
+    sections = crud_section.get_section_fields(db, user_id, section_fields)
+    for section in sections:
+        section["links"] = links_by_section.get(section["id"], [])
+
+    return {
+        "pinned_links": pinned_links,
+        "sections": sections
+    }
+
+@router.post("/", response_model=Link, dependencies=[Depends(rate_limit("create_link", low_priority=True))])
 async def create_link(
     link: LinkCreate,
-    request: Request,
+    user_id: int = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    user_id = get_current_user(request)
     return crud_link.create_link(db, link, user_id)
 
 @router.put("/{link_id}", response_model=Link)
 async def update_link(
     link_id: int,
     link_update: LinkUpdate,
-    request: Request,
+    user_id: int = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    user_id = get_current_user(request)
     link = crud_link.update_link(db, link_id, link_update, user_id)
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
@@ -83,10 +119,9 @@ async def update_link(
 @router.delete("/{link_id}")
 async def delete_link(
     link_id: int,
-    request: Request,
+    user_id: int = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    user_id = get_current_user(request)
     success = crud_link.delete_link(db, link_id, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Link not found")
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+from app.core.compression import encoded_etag
+from app.core.config import settings
+from app.core.deps import get_read_db
+from app.crud import crud_snapshot
+
+router = APIRouter()
+
+@router.get("/{slug}")
+async def get_public_section(
+    slug: str,
+    request: Request,
+    format: str = Query("json", pattern="^(json|html)$"),
+    db: Session = Depends(get_read_db)
+):
+    snapshot = crud_snapshot.get_snapshot_by_slug(db, slug)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Section not found")
+
+    if format == "html":
+        if not snapshot.content_html:
+            raise HTTPException(status_code=404, detail="HTML snapshot not available")
+        content, media_type = snapshot.content_html, "text/html"
+        etag = snapshot.etag[:-1] + '-html"'
+    else:
+        content, media_type = snapshot.content_json, "application/json"
+        etag = snapshot.etag
+
+    # Snapshots are immutable per ETag, so CDNs and browsers can cache them freely
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={settings.PUBLIC_SNAPSHOT_MAX_AGE}, "
+            f"stale-while-revalidate={settings.PUBLIC_SNAPSHOT_STALE_WHILE_REVALIDATE}"
+        ),
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    # Compressed copies carry the ETag suffixed by CompressionMiddleware
+    variants = {etag, *(encoded_etag(etag, encoding) for encoding in ("gzip", "br"))}
+    for tag in if_none_match.split(","):
+        # If-None-Match uses the weak comparison, W/"x" matches "x"
+        tag = tag.strip().removeprefix("W/")
+        if tag in variants:
+            return Response(status_code=304, headers={**headers, "ETag": tag})
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -1,50 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.database import SessionLocal
-from app.crud import crud_section
+from typing import List, Optional
+from app.core.deps import get_db, get_read_db, get_current_user
+from app.core.projection import resolve_fields
+from app.crud import crud_section, crud_snapshot
 from app.schemas.schemas import Section, SectionCreate, SectionUpdate, SectionReorder
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(request: Request):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    return user_id
-
 @router.get("/", response_model=List[Section])
 async def get_sections(
-    request: Request,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    compact: bool = False,
+    user_id: int = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
-    user_id = get_current_user(request)
+    section_fields = resolve_fields(
+        fields, compact, crud_section.SECTION_FIELDS, crud_section.COMPACT_SECTION_FIELDS
+    )
+    if section_fields:
+        rows = crud_section.get_section_fields(db, user_id, section_fields)
+        return JSONResponse(content=jsonable_encoder(rows))
     return crud_section.get_sections(db, user_id)
 
 @router.post("/", response_model=Section)
 async def create_section(
     section: SectionCreate,
-    request: Request,
+    user_id: int = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    user_id = get_current_user(request)
     return crud_section.create_section(db, section, user_id)
 
 @router.put("/{section_id}", response_model=Section)
 async def update_section(
     section_id: int,
     section_update: SectionUpdate,
-    request: Request,
+    user_id: int = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    user_id = get_current_user(request)
     section = crud_section.update_section(db, section_id, section_update, user_id)
     if not section:
         raise HTTPException(status_code=404, detail="Section not found")
@@ -53,10 +48,9 @@ async def update_section(
 @router.delete("/{section_id}")
 async def delete_section(
     section_id: int,
-    request: Request,
+    user_id: int = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    user_id = get_current_user(request)
     success = crud_section.delete_section(db, section_id, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Section not found or cannot be deleted")
@@ -65,11 +59,33 @@ async def delete_section(
 @router.post("/reorder")
 async def reorder_sections(
     reorder_data: SectionReorder,
-    request: Request,
+    user_id: int = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    user_id = get_current_user(request)
     success = crud_section.reorder_sections(db, reorder_data.section_orders, user_id)
     if not success:
         raise HTTPException(status_code=400, detail="Failed to reorder sections")
-    return {"message": "Sections reordered successfully"}
\ No newline at end of file
+    return {"message": "Sections reordered successfully"}
+
+@router.post("/{section_id}/publish")
+async def publish_section(
+    section_id: int,
+    user_id: int = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    section = crud_section.get_section(db, section_id, user_id)
+    if not section:
+        raise HTTPException(status_code=404, detail="Section not found")
+    snapshot = crud_snapshot.publish_section(db, section)
+    return {"slug": snapshot.slug, "path": f"/public/{snapshot.slug}"}
+
+@router.delete("/{section_id}/publish")
+async def unpublish_section(
+    section_id: int,
+    user_id: int = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    success = crud_snapshot.unpublish_section(db, section_id, user_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Section is not published")
+    return {"message": "Section unpublished successfully"}
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud import crud_link, crud_snapshot
+from app.services.metadata_service import fetch_website_metadata, metadata_fetch_state, utcnow
+
+logger = logging.getLogger(__name__)
+
+def refresh_stale_metadata(
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> int:
+    """
+    Run one refresh pass over the links most in need of new metadata.
+    Returns the number of links written back.
+    """
+    batch_size = batch_size or settings.METADATA_REFRESH_BATCH_SIZE
+    concurrency = concurrency or settings.METADATA_REFRESH_CONCURRENCY
+    time_budget = time_budget or settings.METADATA_REFRESH_TIME_BUDGET
+
+    now = utcnow()
+    stale_before = now - timedelta(days=settings.METADATA_MAX_AGE_DAYS)
+
+    # Snapshot and lease the batch, then release the session before any network I/O
+    db = SessionLocal()
+    try:
+        candidates = [
+            {
+                "id": link.id,
+                "user_id": link.user_id,
+                "section_id": link.section_id,
+                "url": link.url,
+            }
+            for link in crud_link.get_links_needing_metadata(db, now, stale_before, batch_size)
+        ]
+        # Every worker runs this scheduler, the lease keeps them off each other's batches
+        lease_until = now + timedelta(seconds=settings.METADATA_REFRESH_LEASE)
+        claimed = crud_link.claim_links_for_refresh(db, candidates, now, lease_until)
+        links = [link for link in candidates if (link["id"], link["user_id"]) in claimed]
+        # Backoff is kept per URL, continue from the furthest link along
+        attempts_by_url = crud_link.get_metadata_attempts_by_url(db, list({link["url"] for link in links}))
+    finally:
+        db.close()
+
+    if not links:
+        return 0
+
+    # The same URL is often saved by several users, fetch it once
+    links_by_url: Dict[str, List[Dict]] = {}
+    for link in links:
+        links_by_url.setdefault(link["url"], []).append(link)
+
+    results = fetch_all(list(links_by_url), concurrency, time.monotonic() + time_budget)
+
+    updates = [
+        build_metadata_update(link, metadata, attempts_by_url.get(url, 0), utcnow())
+        for url, metadata in results.items()
+        for link in links_by_url[url]
+    ]
+
+    db = SessionLocal()
+    try:
+        crud_link.bulk_update_link_metadata(db, updates)
+        # Published sections showing these links need re-rendering
+        sections_by_user: Dict[int, set] = {}
+        for link in links:
+            if link["url"] in results:
+                sections_by_user.setdefault(link["user_id"], set()).add(link["section_id"])
+        for user_id, section_ids in sections_by_user.items():
+            crud_snapshot.refresh_section_snapshots(db, user_id, section_ids)
+    finally:
+        db.close()
+
+    return len(updates)
+
+def fetch_all(urls: List[str], concurrency: int, deadline: float) -> Dict[str, Dict]:
+    """Fetch metadata for urls in waves of at most `concurrency`, stopping at the deadline."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for start in range(0, len(urls), concurrency):
+            if time.monotonic() >= deadline:
+                logger.info(f"Metadata refresh out of time budget, {len(urls) - start} URLs deferred")
+                break
+            wave = urls[start:start + concurrency]
+            for url, metadata in zip(wave, executor.map(fetch_website_metadata, wave)):
+                results[url] = metadata
+    return results
+
+def build_metadata_update(link: Dict, metadata: Dict, attempts: int, now: datetime) -> Dict:
+    """
+    Parameters for bulk_update_link_metadata. Fetched values are only passed
+    through, the UPDATE decides in SQL which of them may replace what is stored.
+    """
+    return {
+        "b_id": link["id"],
+        "b_user_id": link["user_id"],
+        "b_url": link["url"],
+        # A page that failed partway through parsing still gives what was found
+        "m_title": metadata["title"] or None,
+        "m_description": metadata["description"] or None,
+        "m_favicon_url": metadata["favicon_url"] or None,
+        **metadata_fetch_state(metadata["error"], attempts, now),
+    }
+
+async def run_metadata_refresh_scheduler():
+    """Background loop: one refresh pass every METADATA_REFRESH_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(settings.METADATA_REFRESH_INTERVAL)
+        try:
+            # Fetching and parsing are blocking, keep them off the event loop
+            refreshed = await asyncio.to_thread(refresh_stale_metadata)
+            if refreshed:
+                logger.info(f"Refreshed metadata for {refreshed} links")
+        except Exception as e:
+            logger.error(f"Metadata refresh run failed: {e}")
@@ -2,19 +2,51 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import logging
+from datetime import datetime, timedelta
 from typing import Dict, Optional
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+def utcnow() -> datetime:
+    """Naive UTC timestamp, matching what SQLite hands back for DateTime columns."""
+    return datetime.utcnow()
+
+def metadata_fetch_state(error: Optional[str], attempts: int = 0, now: Optional[datetime] = None) -> Dict:
+    """
+    Bookkeeping columns for a link after a metadata fetch.
+    Failed fetches back off exponentially, capped at METADATA_RETRY_MAX. The
+    refresh scheduler keeps one schedule per URL across all links saving it.
+    """
+    now = now or utcnow()
+    if not error:
+        return {
+            "metadata_status": "ok",
+            "metadata_fetched_at": now,
+            "metadata_attempts": 0,
+            "metadata_next_attempt_at": None,
+        }
+
+    attempts += 1
+    delay = min(settings.METADATA_RETRY_BASE * 2 ** (attempts - 1), settings.METADATA_RETRY_MAX)
+    return {
+        "metadata_status": "failed",
+        "metadata_fetched_at": now,
+        "metadata_attempts": attempts,
+        "metadata_next_attempt_at": now + timedelta(seconds=delay),
+    }
+
 def fetch_website_metadata(url: str) -> Dict[str, Optional[str]]:
     """
     Fetch website metadata including title, description, and favicon.
-    Returns a dict with title, description, and favicon_url.
+    Returns a dict with title, description, and favicon_url, plus error
+    which is set when the page could not be fetched or parsed.
     """
     metadata = {
         "title": None,
         "description": None,
-        "favicon_url": None
+        "favicon_url": None,
+        "error": None
     }
     
     try:
@@ -31,46 +63,68 @@ def fetch_website_metadata(url: str) -> Dict[str, Optional[str]]:
         response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
         response.raise_for_status()
         
-        # Parse HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract title
-        title_tag = soup.find('title')
-        if title_tag:
-            metadata["title"] = title_tag.get_text().strip()
-        
-        # Try Open Graph title first, then regular title
-        og_title = soup.find('meta', property='og:title')
-        if og_title and og_title.get('content'):
-            metadata["title"] = og_title['content'].strip()
-        
-        # Extract description
-        # Try meta description first
-        desc_tag = soup.find('meta', attrs={'name': 'description'})
-        if desc_tag and desc_tag.get('content'):
-            metadata["description"] = desc_tag['content'].strip()
+        # Filled in place, fields parsed before an error are kept
+        extract_metadata(response.content, url, metadata)
         
-        # Try Open Graph description
-        og_desc = soup.find('meta', property='og:description')
-        if og_desc and og_desc.get('content'):
-            metadata["description"] = og_desc['content'].strip()
-        
-        # Extract favicon
-        favicon_url = extract_favicon_url(soup, url)
-        if favicon_url:
-            metadata["favicon_url"] = favicon_url
-            
-        # Truncate fields if too long
-        if metadata["title"] and len(metadata["title"]) > 200:
-            metadata["title"] = metadata["title"][:197] + "..."
-            
-        if metadata["description"] and len(metadata["description"]) > 500:
-            metadata["description"] = metadata["description"][:497] + "..."
-            
     except requests.exceptions.RequestException as e:
         logger.warning(f"Failed to fetch metadata for {url}: {e}")
+        metadata["error"] = str(e)
     except Exception as e:
         logger.error(f"Unexpected error fetching metadata for {url}: {e}")
+        metadata["error"] = str(e)
+    
+    return metadata
+
+def extract_metadata(content: bytes, url: str, metadata: Optional[Dict] = None) -> Dict[str, Optional[str]]:
+    """
+    Extract title, description, and favicon_url from a fetched page.
+    This is the CPU-bound half of fetch_website_metadata, kept separate so it
+    can be benchmarked offline. Fields are written into metadata as they are
+    found, so a caller passing its own dict keeps them if parsing fails later.
+    """
+    if metadata is None:
+        metadata = {}
+    metadata.update({
+        "title": None,
+        "description": None,
+        "favicon_url": None
+    })
+    
+    # Parse HTML
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # Extract title
+    title_tag = soup.find('title')
+    if title_tag:
+        metadata["title"] = title_tag.get_text().strip()
+    
+    # Try Open Graph title first, then regular title
+    og_title = soup.find('meta', property='og:title')
+    if og_title and og_title.get('content'):
+        metadata["title"] = og_title['content'].strip()
+    
+    # Extract description
+    # Try meta description first
+    desc_tag = soup.find('meta', attrs={'name': 'description'})
+    if desc_tag and desc_tag.get('content'):
+        metadata["description"] = desc_tag['content'].strip()
+    
+    # Try Open Graph description
+    og_desc = soup.find('meta', property='og:description')
+    if og_desc and og_desc.get('content'):
+        metadata["description"] = og_desc['content'].strip()
+    
+    # Extract favicon
+    favicon_url = extract_favicon_url(soup, url)
+    if favicon_url:
+        metadata["favicon_url"] = favicon_url
+        
+    # Truncate fields if too long
+    if metadata["title"] and len(metadata["title"]) > 200:
+        metadata["title"] = metadata["title"][:197] + "..."
+        
+    if metadata["description"] and len(metadata["description"]) > 500:
+        metadata["description"] = metadata["description"][:497] + "..."
     
     return metadata
 
@@ -0,0 +1,33 @@
+import hashlib
+import html
+import json
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+def render_section(name: str, links: List[Dict]) -> Dict[str, Optional[str]]:
+    """
+    Render a section's public snapshot: compact JSON, HTML when
+    PUBLIC_SNAPSHOT_HTML is on, and a strong ETag of the JSON.
+    links are dicts with title, url, description and favicon_url.
+    """
+    content_json = json.dumps({"name": name, "links": links}, separators=(",", ":"), ensure_ascii=False)
+
+    content_html = None
+    if settings.PUBLIC_SNAPSHOT_HTML:
+        items = "".join(
+            f'<li><a href="{html.escape(link["url"])}" rel="noopener nofollow">{html.escape(link["title"])}</a>'
+            + (f'<p>{html.escape(link["description"])}</p>' if link["description"] else "")
+            + "</li>"
+            for link in links
+        )
+        title = html.escape(name)
+        content_html = (
+            f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title></head>'
+            f'<body><h1>{title}</h1><ul>{items}</ul></body></html>'
+        )
+
+    return {
+        "content_json": content_json,
+        "content_html": content_html,
+        "etag": '"' + hashlib.sha256(content_json.encode("utf-8")).hexdigest()[:32] + '"',
+    }
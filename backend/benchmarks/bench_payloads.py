@@ -0,0 +1,62 @@
+"""
+Payload size and latency of the list endpoints at several vault sizes.
+
+Compares full vs compact/fields= projections, each with identity, gzip and
+brotli encodings.
+
+    python benchmarks/bench_payloads.py [--sizes 100,1000,5000] [--repeat 20]
+"""
+import argparse
+
+from harness import setup_database, session_cookie, create_user, seed_vault, measure
+
+LINK_VARIANTS = [
+    ("full", ""),
+    ("compact", "compact=true"),
+    ("fields", "fields=title,url"),
+]
+SECTION_VARIANTS = [
+    ("full", ""),
+    ("compact", "compact=true"),
+    ("fields", "fields=name"),
+]
+ENDPOINTS = [
+    ("/links/", LINK_VARIANTS),
+    ("/links/dashboard", LINK_VARIANTS),
+    ("/sections/", SECTION_VARIANTS),
+]
+ENCODINGS = ["identity", "gzip", "br"]
+
+def run(sizes, repeat):
+    setup_database("payloads")
+    from fastapi.testclient import TestClient
+    from app.core.database import SessionLocal
+    from main import app
+
+    print(f"{'links':>6} {'endpoint':<17} {'variant':<8} {'encoding':<9} {'bytes':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for n_links in sizes:
+        db = SessionLocal()
+        user_id = create_user(db, email=f"bench{n_links}@example.com")
+        seed_vault(db, user_id, n_links)
+        db.close()
+
+        client = TestClient(app, cookies=session_cookie(user_id))
+        for endpoint, variants in ENDPOINTS:
+            for variant, query in variants:
+                url = f"{endpoint}?{query}" if query else endpoint
+                for encoding in ENCODINGS:
+                    headers = {"Accept-Encoding": encoding}
+                    # httpx transparently decodes, Content-Length is the on-the-wire size
+                    response = client.get(url, headers=headers)
+                    response.raise_for_status()
+                    wire_size = int(response.headers.get("content-length", len(response.content)))
+                    stats = measure(lambda: client.get(url, headers=headers), repeat)
+                    print(f"{n_links:>6} {endpoint:<17} {variant:<8} {encoding:<9} "
+                          f"{wire_size:>9} {stats['p50']:>8.2f} {stats['p95']:>8.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(",")], args.repeat)
@@ -0,0 +1,114 @@
+"""
+Mixed read/write throughput for each STORAGE_PROFILE.
+
+Reader processes load dashboards through read-only sessions while writer
+processes commit links, all against one SQLite file, for a fixed duration.
+
+    python benchmarks/bench_storage_profiles.py [--readers 4] [--writers 4] [--seconds 5] [--links 500]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+from harness import setup_database, create_schema
+
+def reader(env, user_id, seconds, barrier, results):
+    os.environ.update(env)
+    from sqlalchemy.exc import OperationalError
+    from app.core.database import ReadSessionLocal
+    from app.crud import crud_link, crud_section
+
+    barrier.wait()
+    done, errors = 0, 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        db = ReadSessionLocal()
+        try:
+            crud_link.get_pinned_links(db, user_id)
+            for section in crud_section.get_sections(db, user_id):
+                list(section.links)
+            done += 1
+        except OperationalError:
+            errors += 1
+        finally:
+            db.close()
+    results.put(("read", done, errors))
+
+def writer(env, user_id, seconds, barrier, results):
+    os.environ.update(env)
+    from sqlalchemy.exc import OperationalError
+    from app.core.database import SessionLocal
+    from app.models.models import Link
+
+    barrier.wait()
+    done, errors = 0, 0
+    deadline = time.perf_counter() + seconds
+    db = SessionLocal()
+    while time.perf_counter() < deadline:
+        db.add(Link(title=f"Link {done}", url=f"https://example.com/{user_id}/{done}", user_id=user_id))
+        try:
+            db.commit()
+            done += 1
+        except OperationalError:
+            db.rollback()
+            errors += 1
+    db.close()
+    results.put(("write", done, errors))
+
+def seed(env, users, links):
+    os.environ.update(env)
+    from app.core.database import SessionLocal
+    from harness import create_user, seed_vault
+
+    db = SessionLocal()
+    for i in range(users):
+        seed_vault(db, create_user(db, email=f"user{i}@example.com"), links)
+    db.close()
+
+def run_profile(profile, readers, writers, seconds, links):
+    setup_database(f"profile_{profile}")
+    env = {
+        "DATABASE_URL": os.environ["DATABASE_URL"],
+        "STORAGE_PROFILE": profile,
+        "METADATA_REFRESH_ENABLED": "false",
+    }
+    ctx = multiprocessing.get_context("spawn")
+    for target, args in ((create_schema, (env,)), (seed, (env, readers + writers, links))):
+        process = ctx.Process(target=target, args=args)
+        process.start()
+        process.join()
+
+    barrier = ctx.Barrier(readers + writers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=reader, args=(env, i + 1, seconds, barrier, results)) for i in range(readers)
+    ] + [
+        ctx.Process(target=writer, args=(env, readers + i + 1, seconds, barrier, results)) for i in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    totals = {"read": [0, 0], "write": [0, 0]}
+    for kind, done, errors in outcomes:
+        totals[kind][0] += done
+        totals[kind][1] += errors
+    return totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--links", type=int, default=500, help="links per user")
+    parser.add_argument("--profiles", default="default,production")
+    args = parser.parse_args()
+
+    print(f"{'profile':<11} {'reads/s':>9} {'read errs':>9} {'writes/s':>9} {'write errs':>10}")
+    for profile in args.profiles.split(","):
+        totals = run_profile(profile, args.readers, args.writers, args.seconds, args.links)
+        print(f"{profile:<11} {totals['read'][0] / args.seconds:>9.1f} {totals['read'][1]:>9} "
+              f"{totals['write'][0] / args.seconds:>9.1f} {totals['write'][1]:>10}")
@@ -0,0 +1,81 @@
+"""
+Concurrent write throughput, single SQLite database vs sharded storage.
+
+Each worker process plays one user and commits links one at a time, like
+POST /links/ does (minus the metadata fetch). Reports commits/s and how many
+commits failed with "database is locked".
+
+    python benchmarks/bench_write_concurrency.py [--workers 8] [--writes 200] [--shards 4]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+from harness import setup_database, create_schema
+
+def worker(env, index, writes, barrier, results):
+    os.environ.update(env)
+    from sqlalchemy.exc import OperationalError
+    from app.core.database import SessionLocal
+    from app.models.models import Link
+    from harness import create_user
+
+    db = SessionLocal()
+    user_id = create_user(db, email=f"writer{index}@example.com")
+    barrier.wait()
+
+    committed, locked = 0, 0
+    start = time.perf_counter()
+    for i in range(writes):
+        db.add(Link(title=f"Link {i}", url=f"https://example.com/{index}/{i}", user_id=user_id))
+        try:
+            db.commit()
+            committed += 1
+        except OperationalError:
+            db.rollback()
+            locked += 1
+    results.put((committed, locked, time.perf_counter() - start))
+    db.close()
+
+def run_mode(sharded, workers, writes, shards):
+    setup_database("writes")
+    env = {
+        "DATABASE_URL": os.environ["DATABASE_URL"],
+        "SHARD_DATABASE_URL": os.environ["SHARD_DATABASE_URL"],
+        "SHARDING_ENABLED": "true" if sharded else "false",
+        "SHARD_COUNT": str(shards),
+        "METADATA_REFRESH_ENABLED": "false",
+    }
+    # Create the schema once up front so workers don't race on it
+    ctx = multiprocessing.get_context("spawn")
+    init = ctx.Process(target=create_schema, args=(env,))
+    init.start()
+    init.join()
+
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(env, i, writes, barrier, results)) for i in range(workers)]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    committed = sum(outcome[0] for outcome in outcomes)
+    locked = sum(outcome[1] for outcome in outcomes)
+    elapsed = max(outcome[2] for outcome in outcomes)
+    return committed, locked, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--shards", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'workers':>7} {'commits':>8} {'locked':>7} {'seconds':>8} {'commits/s':>10}")
+    for sharded in (False, True):
+        committed, locked, elapsed = run_mode(sharded, args.workers, args.writes, args.shards)
+        mode = f"sharded/{args.shards}" if sharded else "single"
+        print(f"{mode:<10} {args.workers:>7} {committed:>8} {locked:>7} {elapsed:>8.2f} {committed / elapsed:>10.1f}")
@@ -0,0 +1,97 @@
+"""
+Shared helpers for the backend benchmarks.
+
+Benchmarks run against a throwaway SQLite database. Call setup_database()
+before importing anything from app/ or main so the settings pick it up.
+"""
+import base64
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+def setup_database(name: str = "bench") -> str:
+    """Point DATABASE_URL (and the shard URLs) at fresh temporary SQLite files and return their directory."""
+    tmpdir = tempfile.mkdtemp(prefix="linkvault-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir}/{name}.db"
+    os.environ["SHARD_DATABASE_URL"] = f"sqlite:///{tmpdir}/{name}_shard_{{shard}}.db"
+    return tmpdir
+
+def create_schema(env: Dict[str, str]) -> None:
+    """Create all tables for the given environment; used as a spawned process target."""
+    os.environ.update(env)
+    import app.models.models  # noqa: F401, registers the tables
+    from app.core.database import create_tables
+
+    create_tables()
+
+def session_cookie(user_id: int) -> Dict[str, str]:
+    """Build a signed session cookie the same way SessionMiddleware does."""
+    from itsdangerous import TimestampSigner
+    from app.core.config import settings
+
+    data = base64.b64encode(json.dumps({"user_id": user_id}).encode("utf-8"))
+    signed = TimestampSigner(str(settings.SECRET_KEY)).sign(data)
+    return {"session": signed.decode("utf-8")}
+
+def create_user(db, email: str = "bench@example.com") -> int:
+    """Create a user (and its Uncategorized section) without going through bcrypt."""
+    from app.crud import crud_user
+    from app.schemas.schemas import UserCreate
+
+    user = crud_user.create_user(db, UserCreate(email=email, name="Bench User"))
+    return user.id
+
+def seed_vault(db, user_id: int, n_links: int, n_sections: int = 10) -> None:
+    """Bulk insert sections and links with realistic description/favicon lengths."""
+    from sqlalchemy import insert
+    from app.core.database import bind_arguments_for_user
+    from app.models.models import Link, Section
+
+    bind_arguments = bind_arguments_for_user(user_id)
+
+    sections = [
+        {"name": f"Section {i}", "order": i, "user_id": user_id}
+        for i in range(n_sections)
+    ]
+    db.execute(insert(Section.__table__), sections, bind_arguments=bind_arguments)
+    db.commit()
+    section_ids = [s.id for s in db.query(Section.id).filter(Section.user_id == user_id).all()]
+
+    links = [
+        {
+            "title": f"Example page number {i} - a reasonably long page title",
+            "url": f"https://www.example{i % 500}.com/articles/{i}/some-slug-for-the-page",
+            "description": ("A fairly typical meta description that sites ship for "
+                            "search engines and social cards, repeated here. " * 3).strip(),
+            "favicon_url": f"https://www.example{i % 500}.com/static/images/apple-touch-icon-180x180.png",
+            "is_pinned": i % 25 == 0,
+            "user_id": user_id,
+            "section_id": section_ids[i % len(section_ids)],
+        }
+        for i in range(n_links)
+    ]
+    db.execute(insert(Link.__table__), links, bind_arguments=bind_arguments)
+    db.commit()
+
+def measure(func: Callable[[], object], repeat: int = 20) -> Dict[str, float]:
+    """Run func repeatedly and return latency stats in milliseconds."""
+    func()  # warm up
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
@@ -0,0 +1,63 @@
+"""
+Offline benchmarks for the metadata extractor, run against metadata_corpus/.
+
+    pip install -r requirements-dev.txt
+    pytest benchmarks/test_metadata_extraction.py
+
+Every page in metadata_corpus/manifest.json must extract the expected title,
+description and favicon, and stay under its max_ms mean parse time and
+max_peak_kb peak allocation. Set METADATA_BENCH_BUDGET_SCALE (e.g. 2) to
+loosen the budgets on slow machines.
+
+To fail on relative regressions against a saved run:
+
+    pytest benchmarks/test_metadata_extraction.py --benchmark-autosave
+    pytest benchmarks/test_metadata_extraction.py --benchmark-compare --benchmark-compare-fail=mean:15%
+"""
+import json
+import os
+import tracemalloc
+
+import pytest
+
+from app.services.metadata_service import extract_metadata
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metadata_corpus")
+BUDGET_SCALE = float(os.getenv("METADATA_BENCH_BUDGET_SCALE", "1"))
+
+with open(os.path.join(CORPUS_DIR, "manifest.json"), encoding="utf-8") as f:
+    PAGES = json.load(f)
+
+def load(page):
+    with open(os.path.join(CORPUS_DIR, page["file"]), "rb") as f:
+        return f.read()
+
+@pytest.mark.parametrize("page", PAGES, ids=[page["file"] for page in PAGES])
+def test_extracts_expected_metadata(page):
+    assert extract_metadata(load(page), page["url"]) == page["expected"]
+
+@pytest.mark.benchmark(group="extract_metadata")
+@pytest.mark.parametrize("page", PAGES, ids=[page["file"] for page in PAGES])
+def test_parse_time(benchmark, page):
+    content = load(page)
+    result = benchmark(extract_metadata, content, page["url"])
+    assert result == page["expected"]
+
+    if benchmark.stats:  # None under --benchmark-disable
+        mean_ms = benchmark.stats.stats.mean * 1000
+        budget_ms = page["max_ms"] * BUDGET_SCALE
+        assert mean_ms <= budget_ms, f"{page['file']}: {mean_ms:.1f} ms > {budget_ms:.0f} ms budget"
+
+@pytest.mark.parametrize("page", PAGES, ids=[page["file"] for page in PAGES])
+def test_peak_allocations(page):
+    content = load(page)
+    tracemalloc.start()
+    try:
+        extract_metadata(content, page["url"])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    peak_kb = peak / 1024
+    budget_kb = page["max_peak_kb"] * BUDGET_SCALE
+    assert peak_kb <= budget_kb, f"{page['file']}: {peak_kb:.0f} KB peak > {budget_kb:.0f} KB budget"
@@ -1,17 +1,21 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
 from authlib.integrations.starlette_client import OAuth
 from starlette.middleware.sessions import SessionMiddleware
 import os
-from app.core.database import SessionLocal, engine
+import asyncio
+from app.core.database import create_tables
+from app.core.deps import get_current_user_record
 from app.models import models
-from app.routers import auth, sections, links
+from app.routers import auth, sections, links, public
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.load_shedding import InFlightMiddleware, load_monitor
+from app.services.metadata_refresh import run_metadata_refresh_scheduler
 
 # Create tables
-models.Base.metadata.create_all(bind=engine)
+create_tables()
 
 app = FastAPI(title="LinkVault", version="1.0.0")
 
@@ -27,6 +31,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (brotli when available, otherwise gzip)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+# Track in-flight requests for load shedding
+app.add_middleware(InFlightMiddleware)
+
 # OAuth setup
 oauth = OAuth()
 oauth.register(
@@ -39,40 +54,39 @@ oauth.register(
     }
 )
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(request: Request):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    return user_id
-
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(sections.router, prefix="/sections", tags=["sections"])
 app.include_router(links.router, prefix="/links", tags=["links"])
+app.include_router(public.router, prefix="/public", tags=["public"])
 
 # Make OAuth available to auth router
 app.state.oauth = oauth
 
+@app.on_event("startup")
+async def start_metadata_refresh():
+    if settings.METADATA_REFRESH_ENABLED:
+        app.state.metadata_refresh_task = asyncio.create_task(run_metadata_refresh_scheduler())
+
+@app.on_event("startup")
+async def start_load_monitor():
+    if settings.LOAD_SHED_ENABLED:
+        app.state.load_monitor_task = asyncio.create_task(load_monitor.watch_event_loop())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for name in ("metadata_refresh_task", "load_monitor_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+
 @app.get("/")
 async def root():
     return {"message": "LinkVault API"}
 
 @app.get("/me")
-async def get_current_user_info(request: Request, db: Session = Depends(get_db)):
-    user_id = get_current_user(request)
-    from app.crud import crud_user
-    user = crud_user.get_user(db, user_id=user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return {"id": user.id, "email": user.email, "name": user.name}
+async def get_current_user_info(user: dict = Depends(get_current_user_record)):
+    return {"id": user["id"], "email": user["email"], "name": user["name"]}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,120 @@
+"""
+Move users' sections and links between SQLite shards.
+
+    python scripts/rebalance_shards.py --to-count 8          # re-hash every user onto 8 shards
+    python scripts/rebalance_shards.py --user 42 --shard 3   # pin one busy tenant to shard 3
+
+Run it with the API stopped, then set SHARD_COUNT to the new count. Section
+and link ids are only unique per shard, so moved users get new ids.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, delete, insert, select, update
+from app.core.config import settings
+from app.models.models import Base, User, Section, Link, SectionSnapshot
+
+users = User.__table__
+snapshots = SectionSnapshot.__table__
+sections = Section.__table__
+links = Link.__table__
+
+def shard_engines(count: int):
+    engines = []
+    for i in range(count):
+        engine = create_engine(settings.SHARD_DATABASE_URL.format(shard=i))
+        Base.metadata.create_all(bind=engine, tables=[sections, links])
+        engines.append(engine)
+    return engines
+
+def move_user(directory, source, target, user_id: int, pinned_shard=None) -> int:
+    """Copy a user's rows to target, repoint the directory, then delete them from source."""
+    with source.connect() as conn:
+        section_rows = conn.execute(select(sections).where(sections.c.user_id == user_id)).mappings().all()
+        link_rows = conn.execute(select(links).where(links.c.user_id == user_id)).mappings().all()
+
+    with target.begin() as conn:
+        section_ids = {}
+        for row in section_rows:
+            data = dict(row)
+            old_id = data.pop("id")
+            section_ids[old_id] = conn.execute(insert(sections).values(**data)).inserted_primary_key[0]
+        new_links = []
+        for row in link_rows:
+            data = dict(row)
+            data.pop("id")
+            data["section_id"] = section_ids.get(data["section_id"])
+            new_links.append(data)
+        if new_links:
+            conn.execute(insert(links), new_links)
+
+    # The directory switch is the commit point, a crash before it leaves the source intact
+    with directory.begin() as conn:
+        conn.execute(update(users).where(users.c.id == user_id).values(shard=pinned_shard))
+        published = conn.execute(
+            select(snapshots.c.id, snapshots.c.section_id).where(snapshots.c.user_id == user_id)
+        ).all()
+        for snapshot_id, section_id in published:
+            conn.execute(update(snapshots).where(snapshots.c.id == snapshot_id).values(
+                section_id=section_ids.get(section_id, section_id)
+            ))
+
+    with source.begin() as conn:
+        conn.execute(delete(links).where(links.c.user_id == user_id))
+        conn.execute(delete(sections).where(sections.c.user_id == user_id))
+
+    return len(link_rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-count", type=int, default=settings.SHARD_COUNT, help="current shard count")
+    parser.add_argument("--to-count", type=int, help="re-hash all unpinned users onto this many shards")
+    parser.add_argument("--user", type=int, help="move a single user")
+    parser.add_argument("--shard", type=int, help="shard to pin --user to")
+    args = parser.parse_args()
+
+    if args.to_count is None and (args.user is None or args.shard is None):
+        parser.error("pass --to-count, or --user together with --shard")
+    shard_count = args.to_count or args.from_count
+    if args.shard is not None and not 0 <= args.shard < shard_count:
+        # The API only opens shard_0 .. shard_{SHARD_COUNT - 1}, a pin outside that breaks the user
+        parser.error(f"--shard must be between 0 and {shard_count - 1} for {shard_count} shards")
+
+    directory = create_engine(settings.DATABASE_URL)
+    engines = shard_engines(max(args.from_count, args.to_count or 0))
+
+    with directory.connect() as conn:
+        query = select(users.c.id, users.c.shard)
+        if args.user is not None:
+            query = query.where(users.c.id == args.user)
+        placements = conn.execute(query).all()
+
+    moved = 0
+    for user_id, pinned in placements:
+        current = pinned if pinned is not None else user_id % args.from_count
+        if args.user is not None:
+            target, new_pin = args.shard, args.shard
+        elif pinned is not None and pinned < args.to_count:
+            continue  # explicitly placed users stay where they are
+        else:
+            target, new_pin = user_id % args.to_count, None
+
+        if target == current:
+            if pinned != new_pin:
+                with directory.begin() as conn:
+                    conn.execute(update(users).where(users.c.id == user_id).values(shard=new_pin))
+            continue
+
+        count = move_user(directory, engines[current], engines[target], user_id, new_pin)
+        moved += 1
+        print(f"user {user_id}: shard_{current} -> shard_{target} ({count} links)")
+
+    print(f"Moved {moved} users")
+    if args.to_count is not None and args.to_count != args.from_count:
+        print(f"Now set SHARD_COUNT={args.to_count} and restart the API")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import sys
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.core.sharding import ShardRouter
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'linkvault.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def router(tmp_path):
+    """A directory database and two data shards, user_id % 2 picks the shard."""
+    directory = create_engine(f"sqlite:///{tmp_path / 'directory.db'}", connect_args={"check_same_thread": False})
+    shards = [
+        create_engine(f"sqlite:///{tmp_path / f'shard_{i}.db'}", connect_args={"check_same_thread": False})
+        for i in range(2)
+    ]
+    router = ShardRouter(directory, shards)
+    router.create_all(Base.metadata)
+    yield router
+    for engine in [directory, *shards]:
+        engine.dispose()
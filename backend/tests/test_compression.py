@@ -0,0 +1,115 @@
+"""CompressionMiddleware and Accept-Encoding negotiation."""
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from app.core import compression
+from app.core.compression import CompressionMiddleware, encoded_etag, select_encoding
+
+BODY = "linkvault " * 200  # 2000 bytes
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(BODY, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny", headers={"ETag": '"abc"'})
+
+    @app.get("/weak")
+    def weak():
+        return PlainTextResponse(BODY, headers={"ETag": 'W/"abc"'})
+
+    @app.get("/encoded")
+    def encoded():
+        return Response(gzip.compress(BODY.encode()), headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BODY.encode()] * 3), media_type="text/plain")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "br"),
+    ("*;q=0.5, br;q=0", "gzip"),
+    ("identity", None),
+    ("", None),
+    ("gzip;q=bogus", None),
+    ("GZIP", "gzip"),
+])
+def test_select_encoding(header, expected):
+    assert select_encoding(header) == expected
+
+
+def test_select_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert select_encoding("br, gzip") == "gzip"
+    assert select_encoding("br") is None
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_large_responses_are_compressed(client, encoding):
+    response = client.get("/large", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.text == BODY
+
+
+def test_small_responses_are_sent_as_is(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+    assert response.text == "tiny"
+
+
+def test_identity_clients_get_the_original_body(client):
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_strong_etag_is_suffixed_per_encoding(client, encoding):
+    response = client.get("/large", headers={"Accept-Encoding": encoding})
+    assert response.headers["etag"] == f'"abc-{encoding}"'
+
+
+def test_weak_etag_is_kept(client):
+    response = client.get("/weak", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["etag"] == 'W/"abc"'
+
+
+def test_already_encoded_responses_pass_through(client):
+    response = client.get("/encoded", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BODY
+
+
+def test_streaming_responses_are_compressed_without_length(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == BODY * 3
+
+
+@pytest.mark.parametrize("etag, expected", [
+    ('"abc"', '"abc-br"'),
+    ('W/"abc"', 'W/"abc"'),
+    ("unquoted", "unquoted"),
+])
+def test_encoded_etag(etag, expected):
+    assert encoded_etag(etag, "br") == expected
@@ -0,0 +1,37 @@
+"""Storage profile settings and in-place schema upgrades."""
+import typing
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine, inspect, text
+from app.core.config import Settings
+from app.core.database import STORAGE_PROFILES, Base, add_missing_columns
+from app.models import models  # noqa: F401, registers the tables on Base.metadata
+
+
+def test_every_allowed_storage_profile_is_defined():
+    allowed = typing.get_args(Settings.model_fields["STORAGE_PROFILE"].annotation)
+    assert set(allowed) == set(STORAGE_PROFILES)
+
+
+def test_unknown_storage_profile_lists_the_allowed_ones():
+    with pytest.raises(ValidationError, match="'default' or 'production'"):
+        Settings(STORAGE_PROFILE="prod")
+
+
+def test_missing_columns_are_added_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR)"))
+        conn.execute(text("CREATE TABLE links (id INTEGER PRIMARY KEY, title VARCHAR(200), url TEXT)"))
+        conn.execute(text("INSERT INTO links (title, url) VALUES ('t', 'https://example.com')"))
+
+    add_missing_columns(engine, Base.metadata)
+    add_missing_columns(engine, Base.metadata)
+
+    inspector = inspect(engine)
+    assert "shard" in {column["name"] for column in inspector.get_columns("users")}
+    assert {"metadata_status", "metadata_attempts"} <= {column["name"] for column in inspector.get_columns("links")}
+    assert "ix_links_metadata_status" in {index["name"] for index in inspector.get_indexes("links")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT title, metadata_status FROM links")).all() == [("t", None)]
+    engine.dispose()
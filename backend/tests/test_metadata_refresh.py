@@ -0,0 +1,257 @@
+"""Background metadata refresh: batch selection, leasing and write-back."""
+import threading
+import time
+from datetime import timedelta
+import pytest
+from app.core import database
+from app.core.config import settings
+from app.crud import crud_link
+from app.models.models import Link, User
+from app.services import metadata_refresh
+from app.services.metadata_service import metadata_fetch_state, utcnow
+
+
+@pytest.fixture
+def fetched(monkeypatch, session_factory):
+    """Run refreshes against the test database and record every URL fetched."""
+    urls = []
+    lock = threading.Lock()
+
+    def fetch(url):
+        with lock:
+            urls.append(url)
+        time.sleep(0.05)
+        return {"title": f"Title of {url}", "description": "Fetched", "favicon_url": f"{url}/favicon.ico", "error": None}
+
+    monkeypatch.setattr(metadata_refresh, "SessionLocal", session_factory)
+    monkeypatch.setattr(metadata_refresh, "fetch_website_metadata", fetch)
+    return urls
+
+
+@pytest.fixture
+def user_id(db):
+    user = User(email="one@example.com", name="One")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def user_ids_on_shards(router):
+    """Users 1 and 2 in the directory, placed on shard_1 and shard_0."""
+    with router.sessionmaker()() as db:
+        db.add_all([User(id=1, email="one@example.com"), User(id=2, email="two@example.com")])
+        db.commit()
+    return 1, 2
+
+
+def add_links(db, user_id, urls, **columns):
+    links = [Link(title=url, url=url, user_id=user_id, **columns) for url in urls]
+    db.add_all(links)
+    db.commit()
+    return links
+
+
+def test_concurrent_runs_fetch_each_link_once(db, user_id, fetched):
+    urls = [f"https://example.com/{i}" for i in range(20)]
+    add_links(db, user_id, urls, metadata_status="pending")
+
+    start = threading.Barrier(2)
+    refreshed = []
+
+    def run():
+        start.wait()
+        refreshed.append(metadata_refresh.refresh_stale_metadata(batch_size=20, concurrency=4, time_budget=30))
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(fetched) == sorted(urls)
+    assert sum(refreshed) == len(urls)
+    db.expire_all()
+    assert {link.metadata_status for link in db.query(Link)} == {"ok"}
+
+
+def test_leased_links_are_skipped_by_later_runs(db, user_id, fetched, monkeypatch):
+    add_links(db, user_id, ["https://example.com/slow"], metadata_status="pending")
+    # The first run runs out of time before fetching, its lease still holds the link
+    with monkeypatch.context() as patch:
+        patch.setattr(metadata_refresh, "fetch_all", lambda urls, concurrency, deadline: {})
+        assert metadata_refresh.refresh_stale_metadata(batch_size=10, concurrency=1, time_budget=1) == 0
+
+    assert metadata_refresh.refresh_stale_metadata(batch_size=10, concurrency=1, time_budget=1) == 0
+    assert fetched == []
+    db.expire_all()
+    link = db.query(Link).one()
+    assert link.metadata_status == "pending"
+    assert link.metadata_next_attempt_at is not None
+
+
+def test_links_needing_metadata_most_urgent_first(db, user_id):
+    now = utcnow()
+    stale, fresh = now - timedelta(days=60), now - timedelta(days=1)
+    links = {
+        "stale": Link(title="Stale", url="https://stale", favicon_url="f", metadata_status="ok", metadata_fetched_at=stale),
+        "missing": Link(title="https://missing", url="https://missing", favicon_url="f", metadata_status="ok", metadata_fetched_at=stale),
+        "failed": Link(title="Failed", url="https://failed", metadata_status="failed", metadata_fetched_at=fresh,
+                       metadata_attempts=1, metadata_next_attempt_at=now - timedelta(minutes=1)),
+        "pending": Link(title="Pending", url="https://pending", metadata_status="pending"),
+        "legacy": Link(title="Legacy", url="https://legacy", metadata_status=None),
+        "fresh": Link(title="Fresh", url="https://fresh", favicon_url="f", metadata_status="ok", metadata_fetched_at=fresh),
+        "backing_off": Link(title="Backing off", url="https://backing-off", metadata_status="failed", metadata_fetched_at=fresh,
+                            metadata_attempts=2, metadata_next_attempt_at=now + timedelta(hours=1)),
+    }
+    for link in links.values():
+        link.user_id = user_id
+    db.add_all(links.values())
+    db.commit()
+    names = {link.id: name for name, link in links.items()}
+
+    due = crud_link.get_links_needing_metadata(db, now, now - timedelta(days=30), limit=10)
+    assert [names[link.id] for link in due] == ["pending", "legacy", "failed", "missing", "stale"]
+
+    due = crud_link.get_links_needing_metadata(db, now, now - timedelta(days=30), limit=3)
+    assert [names[link.id] for link in due] == ["pending", "legacy", "failed"]
+
+
+def test_links_needing_metadata_keeps_priority_across_shards(router, user_ids_on_shards):
+    db = router.sessionmaker()()
+    now = utcnow()
+    # shard_0 (user 2) only has a stale link, shard_1 (user 1) a changed URL
+    db.add_all([
+        Link(title="Stale", url="https://stale", favicon_url="f", user_id=2, metadata_status="ok",
+             metadata_fetched_at=now - timedelta(days=60)),
+        Link(title="https://changed", url="https://changed", user_id=1, metadata_status="pending"),
+    ])
+    db.commit()
+
+    due = crud_link.get_links_needing_metadata(db, now, now - timedelta(days=30), limit=1)
+    assert [(link.user_id, link.url) for link in due] == [(1, "https://changed")]
+    due = crud_link.get_links_needing_metadata(db, now, now - timedelta(days=30), limit=2)
+    assert [link.url for link in due] == ["https://changed", "https://stale"]
+    db.close()
+
+
+def metadata_row(link, **fetched):
+    row = {
+        "b_id": link.id,
+        "b_user_id": link.user_id,
+        "b_url": link.url,
+        "m_title": None,
+        "m_description": None,
+        "m_favicon_url": None,
+    }
+    row.update(fetched)
+    row.update(metadata_fetch_state(None))
+    return row
+
+
+def test_bulk_update_only_fills_what_the_user_left_blank(db, user_id):
+    raw, named = add_links(db, user_id, ["https://raw", "https://named"])
+    named.title, named.description, named.favicon_url = "My name", "My notes", "https://named/mine.ico"
+    raw.description = ""
+    db.commit()
+
+    crud_link.bulk_update_link_metadata(db, [
+        metadata_row(link, m_title="Fetched title", m_description="Fetched description", m_favicon_url="https://f.ico")
+        for link in (raw, named)
+    ])
+    db.expire_all()
+
+    assert (raw.title, raw.description, raw.favicon_url) == ("Fetched title", "Fetched description", "https://f.ico")
+    assert (named.title, named.description) == ("My name", "My notes")
+    assert named.favicon_url == "https://f.ico"  # the favicon belongs to the scheduler
+
+
+def test_bulk_update_keeps_values_the_fetch_did_not_find(db, user_id):
+    (link,) = add_links(db, user_id, ["https://bare"], favicon_url="https://bare/old.ico")
+    crud_link.bulk_update_link_metadata(db, [metadata_row(link)])
+    db.expire_all()
+    assert (link.title, link.description, link.favicon_url) == ("https://bare", None, "https://bare/old.ico")
+    assert link.metadata_status == "ok"
+
+
+def test_bulk_update_skips_links_whose_url_changed(db, user_id):
+    (link,) = add_links(db, user_id, ["https://old"])
+    row = metadata_row(link, m_title="Old page")
+    link.url = link.title = "https://new"
+    db.commit()
+
+    crud_link.bulk_update_link_metadata(db, [row])
+    db.expire_all()
+    assert link.title == "https://new"
+    assert link.metadata_status == "pending"
+
+
+def test_refresh_keeps_edits_made_during_the_fetch(db, user_id, monkeypatch, session_factory):
+    (link,) = add_links(db, user_id, ["https://example.com"], metadata_status="pending")
+
+    def fetch(url):
+        # The user renames the link while the page is being fetched
+        edit = session_factory()
+        edited = edit.get(Link, link.id)
+        edited.title, edited.description = "Renamed", "Edited"
+        edit.commit()
+        edit.close()
+        return {"title": "Fetched", "description": "Fetched", "favicon_url": "https://example.com/f.ico", "error": None}
+
+    monkeypatch.setattr(metadata_refresh, "SessionLocal", session_factory)
+    monkeypatch.setattr(metadata_refresh, "fetch_website_metadata", fetch)
+    assert metadata_refresh.refresh_stale_metadata(batch_size=10, concurrency=1, time_budget=30) == 1
+
+    db.expire_all()
+    assert (link.title, link.description, link.favicon_url) == ("Renamed", "Edited", "https://example.com/f.ico")
+    assert link.metadata_status == "ok"
+
+
+def failing_fetch(url):
+    return {"title": None, "description": None, "favicon_url": None, "error": "Connection refused"}
+
+
+def test_failed_url_backs_off_on_one_schedule(db, user_id, monkeypatch, session_factory):
+    url = "https://down.example"
+    behind, ahead, healthy = add_links(db, user_id, [url, url, url])
+    behind.metadata_status = "pending"
+    ahead.metadata_status, ahead.metadata_attempts = "failed", 3
+    healthy.metadata_status, healthy.metadata_fetched_at = "ok", utcnow()
+    db.commit()
+
+    monkeypatch.setattr(metadata_refresh, "SessionLocal", session_factory)
+    monkeypatch.setattr(metadata_refresh, "fetch_website_metadata", failing_fetch)
+    # Only the pending link fits in the batch, the URL's backoff still continues from attempt 3
+    metadata_refresh.refresh_stale_metadata(batch_size=1, concurrency=1, time_budget=30)
+
+    db.expire_all()
+    assert (behind.metadata_status, behind.metadata_attempts) == ("failed", 4)
+    assert (ahead.metadata_status, ahead.metadata_attempts) == ("failed", 4)
+    assert behind.metadata_next_attempt_at == ahead.metadata_next_attempt_at
+    assert behind.metadata_next_attempt_at - behind.metadata_fetched_at == timedelta(
+        seconds=min(settings.METADATA_RETRY_BASE * 2 ** 3, settings.METADATA_RETRY_MAX)
+    )
+    assert (healthy.metadata_status, healthy.metadata_attempts) == ("ok", 0)
+
+
+def test_failed_url_backs_off_across_shards(router, user_ids_on_shards, monkeypatch):
+    sessions = router.sessionmaker()
+    monkeypatch.setattr(database, "shard_router", router)
+    monkeypatch.setattr(metadata_refresh, "SessionLocal", sessions)
+    monkeypatch.setattr(metadata_refresh, "fetch_website_metadata", failing_fetch)
+    db = sessions()
+    url = "https://down.example"
+    db.add_all([
+        Link(title=url, url=url, user_id=1, metadata_status="pending"),
+        Link(title=url, url=url, user_id=2, metadata_status="failed", metadata_attempts=2),
+    ])
+    db.commit()
+
+    metadata_refresh.refresh_stale_metadata(batch_size=1, concurrency=1, time_budget=30)
+
+    db.expire_all()
+    links = db.query(Link).all()
+    assert sorted(link.user_id for link in links) == [1, 2]
+    assert {(link.metadata_status, link.metadata_attempts) for link in links} == {("failed", 3)}
+    assert len({link.metadata_next_attempt_at for link in links}) == 1
+    db.close()
@@ -0,0 +1,66 @@
+"""Fetching and parsing page metadata."""
+import pytest
+import requests
+from app.services import metadata_service
+from app.services.metadata_service import extract_metadata, fetch_website_metadata
+
+PAGE = b"""<html><head>
+<title>Plain title</title>
+<meta property="og:title" content="OG title">
+<meta name="description" content="About this page">
+<link rel="icon" href="/icon.png">
+</head><body></body></html>"""
+
+
+class FakeResponse:
+    content = PAGE
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def page(monkeypatch):
+    monkeypatch.setattr(metadata_service.requests, "get", lambda url, **kwargs: FakeResponse())
+
+
+def test_extract_metadata():
+    assert extract_metadata(PAGE, "https://example.com/a") == {
+        "title": "OG title",
+        "description": "About this page",
+        "favicon_url": "https://example.com/icon.png",
+    }
+
+
+def test_fetch_adds_the_scheme_and_no_error(page):
+    assert fetch_website_metadata("example.com") == {
+        "title": "OG title",
+        "description": "About this page",
+        "favicon_url": "https://example.com/icon.png",
+        "error": None,
+    }
+
+
+def test_fields_parsed_before_an_error_are_kept(page, monkeypatch):
+    def broken_favicon(soup, base_url):
+        raise RuntimeError("bad markup")
+
+    monkeypatch.setattr(metadata_service, "extract_favicon_url", broken_favicon)
+    metadata = fetch_website_metadata("https://example.com")
+    assert metadata["title"] == "OG title"
+    assert metadata["description"] == "About this page"
+    assert metadata["favicon_url"] is None
+    assert metadata["error"] == "bad markup"
+
+
+def test_request_errors_are_reported(monkeypatch):
+    def refuse(url, **kwargs):
+        raise requests.exceptions.ConnectionError("Connection refused")
+
+    monkeypatch.setattr(metadata_service.requests, "get", refuse)
+    assert fetch_website_metadata("https://example.com") == {
+        "title": None,
+        "description": None,
+        "favicon_url": None,
+        "error": "Connection refused",
+    }
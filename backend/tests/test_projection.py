@@ -0,0 +1,62 @@
+"""fields= / compact= query param resolution."""
+import pytest
+from fastapi import HTTPException
+from app.core.projection import resolve_fields
+from app.models.models import Link, Section, User
+from app.routers.links import build_projected_dashboard
+
+ALLOWED = ("id", "title", "url", "is_pinned")
+COMPACT = ("id", "title")
+
+
+def test_full_record_by_default():
+    assert resolve_fields(None, False, ALLOWED, COMPACT) is None
+    assert resolve_fields("", False, ALLOWED, COMPACT) is None
+
+
+def test_compact():
+    assert resolve_fields(None, True, ALLOWED, COMPACT) == COMPACT
+
+
+def test_fields_keep_column_order_and_add_id():
+    assert resolve_fields(" url , title,,", False, ALLOWED, COMPACT) == ("id", "title", "url")
+
+
+def test_fields_win_over_compact():
+    assert resolve_fields("url", True, ALLOWED, COMPACT) == ("id", "url")
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(HTTPException) as excinfo:
+        resolve_fields("title,password_hash,zzz", False, ALLOWED, COMPACT)
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Unknown fields: password_hash, zzz"
+
+
+@pytest.fixture
+def vault(db):
+    user = User(email="one@example.com", name="One")
+    db.add(user)
+    db.commit()
+    db.add_all([Section(name="Uncategorized", order=0, user_id=user.id), Section(name="Work", order=1, user_id=user.id)])
+    db.commit()
+    db.add_all([
+        Link(title="Pinned", url="https://a.example", user_id=user.id, section_id=1, is_pinned=True),
+        Link(title="Docs", url="https://b.example", user_id=user.id, section_id=2, is_pinned=False),
+    ])
+    db.commit()
+    return user.id
+
+
+def test_compact_dashboard_uses_compact_section_fields(db, vault):
+    dashboard = build_projected_dashboard(db, vault, ("id", "title"), compact=True)
+    assert dashboard["pinned_links"] == [{"id": 1, "title": "Pinned"}]
+    assert dashboard["sections"] == [
+        {"id": 1, "name": "Uncategorized", "order": 0, "links": []},
+        {"id": 2, "name": "Work", "order": 1, "links": [{"id": 2, "title": "Docs"}]},
+    ]
+
+
+def test_fields_dashboard_keeps_full_sections(db, vault):
+    dashboard = build_projected_dashboard(db, vault, ("id", "url"))
+    assert set(dashboard["sections"][0]) == {"id", "name", "order", "user_id", "created_at", "links"}
@@ -0,0 +1,126 @@
+"""Publishing sections and serving their public snapshots."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.deps import get_current_user, get_db, get_read_db
+from app.crud import crud_link
+from app.models.models import Link, Section, User
+from app.routers import public, sections
+from app.schemas.schemas import LinkUpdate
+
+
+@pytest.fixture
+def user_id(db):
+    user = User(email="one@example.com", name="One")
+    db.add(user)
+    db.commit()
+    db.add_all([Section(name="Uncategorized", order=0, user_id=user.id), Section(name="Reading", order=1, user_id=user.id)])
+    db.commit()
+    db.add_all([
+        Link(title=f"Article {i}", url=f"https://example.com/{i}", description="A <b>good</b> read",
+             user_id=user.id, section_id=2)
+        for i in range(20)
+    ])
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def client(session_factory, user_id):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=200)
+    app.include_router(sections.router, prefix="/sections")
+    app.include_router(public.router, prefix="/public")
+
+    def session():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_read_db] = session
+    app.dependency_overrides[get_current_user] = lambda: user_id
+    return TestClient(app)
+
+
+@pytest.fixture
+def slug(client):
+    response = client.post("/sections/2/publish")
+    assert response.status_code == 200
+    return response.json()["slug"]
+
+
+def test_publish_and_serve(client, slug):
+    response = client.get(f"/public/{slug}", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Reading"
+    assert [link["title"] for link in response.json()["links"]] == [f"Article {i}" for i in range(20)]
+    assert response.headers["cache-control"] == (
+        f"public, max-age={settings.PUBLIC_SNAPSHOT_MAX_AGE}, "
+        f"stale-while-revalidate={settings.PUBLIC_SNAPSHOT_STALE_WHILE_REVALIDATE}"
+    )
+
+    page = client.get(f"/public/{slug}", params={"format": "html"}, headers={"Accept-Encoding": "identity"})
+    assert page.headers["content-type"] == "text/html; charset=utf-8"
+    assert "<h1>Reading</h1>" in page.text
+    assert "A &lt;b&gt;good&lt;/b&gt; read" in page.text
+    assert page.headers["etag"] == response.headers["etag"][:-1] + '-html"'
+
+
+def test_publishing_twice_keeps_the_slug(client, slug):
+    assert client.post("/sections/2/publish").json()["slug"] == slug
+
+
+def test_unpublish(client, slug):
+    assert client.delete("/sections/2/publish").status_code == 200
+    assert client.get(f"/public/{slug}").status_code == 404
+    assert client.delete("/sections/2/publish").status_code == 404
+
+
+def test_unknown_sections_and_slugs_are_404(client):
+    assert client.post("/sections/99/publish").status_code == 404
+    assert client.get("/public/nope").status_code == 404
+
+
+def test_snapshot_follows_link_edits(client, slug, db, user_id):
+    before = client.get(f"/public/{slug}", headers={"Accept-Encoding": "identity"})
+
+    crud_link.update_link(db, 1, LinkUpdate(title="Renamed"), user_id)
+    after = client.get(f"/public/{slug}", headers={"Accept-Encoding": "identity"})
+    assert after.json()["links"][0]["title"] == "Renamed"
+    assert after.headers["etag"] != before.headers["etag"]
+
+    crud_link.update_link(db, 2, LinkUpdate(section_id=1), user_id)
+    crud_link.delete_link(db, 3, user_id)
+    titles = [link["title"] for link in client.get(f"/public/{slug}").json()["links"]]
+    assert "Article 1" not in titles and "Article 2" not in titles
+    assert len(titles) == 18
+
+
+def test_unchanged_content_keeps_the_etag(client, slug, db, user_id):
+    before = client.get(f"/public/{slug}").headers["etag"]
+    crud_link.update_link(db, 1, LinkUpdate(is_pinned=True), user_id)  # not part of the snapshot
+    assert client.get(f"/public/{slug}").headers["etag"] == before
+
+
+@pytest.mark.parametrize("encoding, suffix", [("identity", ""), ("gzip", "-gzip"), ("br", "-br")])
+@pytest.mark.parametrize("format, format_suffix", [("json", ""), ("html", "-html")])
+def test_conditional_requests(client, slug, encoding, suffix, format, format_suffix):
+    url = f"/public/{slug}?format={format}"
+    response = client.get(url, headers={"Accept-Encoding": encoding})
+    etag = response.headers["etag"]
+    assert etag.endswith(f'{format_suffix}{suffix}"')
+
+    for validator in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+        cached = client.get(url, headers={"Accept-Encoding": encoding, "If-None-Match": validator})
+        assert cached.status_code == 304, validator
+        assert cached.content == b""
+        assert "cache-control" in cached.headers
+    assert client.get(url, headers={"Accept-Encoding": encoding, "If-None-Match": etag}).headers["etag"] == etag
+
+    stale = client.get(url, headers={"Accept-Encoding": encoding, "If-None-Match": '"stale"'})
+    assert stale.status_code == 200
@@ -0,0 +1,186 @@
+"""Token bucket rate limiting and load shedding of low priority routes."""
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from starlette.middleware.sessions import SessionMiddleware
+from app.core import rate_limit as rate_limit_module
+from app.core.config import Settings, parse_rate
+from app.core.load_shedding import load_monitor
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimitBackend, RateLimiter, rate_limit
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.mark.parametrize("rate, expected", [
+    ("10/minute", (10, 10 / 60)),
+    ("1/second", (1, 1.0)),
+    (" 3 / Hour", (3, 3 / 3600)),
+    ("24/day", (24, 24 / 86400)),
+])
+def test_parse_rate(rate, expected):
+    assert parse_rate(rate) == expected
+
+
+@pytest.mark.parametrize("rate", ["5/min", "0/minute", "-1/minute", "x/minute", "10", ""])
+def test_parse_rate_rejects_bad_rates(rate):
+    with pytest.raises(ValueError, match="Invalid rate"):
+        parse_rate(rate)
+
+
+def test_rate_limit_overrides_are_merged_into_the_defaults():
+    settings = Settings(RATE_LIMITS={"login": "5/minute"})
+    assert settings.RATE_LIMITS == {"login": "5/minute", "register": "5/minute", "create_link": "30/minute"}
+
+
+@pytest.mark.parametrize("override, message", [
+    ({"logon": "5/minute"}, "Unknown rate limit policies: logon"),
+    ({"login": "5/min"}, "Invalid rate '5/min'"),
+    ({"login": "0/minute"}, "Invalid rate '0/minute'"),
+])
+def test_bad_rate_limit_settings_are_rejected(override, message):
+    with pytest.raises(ValidationError, match=message):
+        Settings(RATE_LIMITS=override)
+
+
+def test_bucket_allows_capacity_then_refills(clock):
+    backend = InMemoryRateLimitBackend()
+    assert [backend.take("k", 3, 1.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.take("k", 3, 1.0) == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert backend.take("k", 3, 1.0) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert backend.take("k", 3, 1.0) == 0.0
+
+    # Refills never exceed the capacity
+    clock.now += 3600
+    assert [backend.take("k", 3, 1.0) for _ in range(4)][-1] > 0
+
+
+def test_buckets_are_separate_per_key(clock):
+    backend = InMemoryRateLimitBackend()
+    assert backend.take("a", 1, 1.0) == 0.0
+    assert backend.take("a", 1, 1.0) > 0
+    assert backend.take("b", 1, 1.0) == 0.0
+
+
+def test_prune_drops_the_longest_idle_buckets(clock):
+    backend = InMemoryRateLimitBackend(max_keys=4)
+    for i in range(5):
+        clock.now += 1
+        backend.take(f"key{i}", 10, 1.0)
+    # Over max_keys, only the newest max_keys // 2 buckets are kept
+    assert sorted(backend._buckets) == ["key3", "key4"]
+
+
+def test_reset_empties_every_bucket(clock):
+    backend = InMemoryRateLimitBackend()
+    backend.take("k", 1, 1.0)
+    backend.reset()
+    assert backend.take("k", 1, 1.0) == 0.0
+
+
+def test_backends_must_implement_every_method():
+    class TakeOnly(RateLimitBackend):
+        def take(self, key, capacity, refill_rate):
+            return 0.0
+
+    with pytest.raises(TypeError):
+        TakeOnly()
+
+
+def test_unconfigured_policies_are_unlimited():
+    limiter = RateLimiter(InMemoryRateLimitBackend(), {"login": "1/minute"})
+    assert limiter.hit("login", "k") == 0.0
+    assert limiter.hit("login", "k") > 0
+    assert all(limiter.hit("export", "k") == 0.0 for _ in range(10))
+
+
+@pytest.fixture
+def client(monkeypatch, clock):
+    limiter = RateLimiter(InMemoryRateLimitBackend(), {"login": "2/minute", "register": "1/hour"})
+    monkeypatch.setattr(rate_limit_module, "limiter", limiter)
+    monkeypatch.setattr(rate_limit_module.settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit_module.settings, "LOAD_SHED_ENABLED", True)
+    monkeypatch.setattr(rate_limit_module.settings, "LOAD_SHED_RETRY_AFTER", 5)
+
+    app = FastAPI()
+    app.add_middleware(SessionMiddleware, secret_key="test")
+
+    @app.post("/login", dependencies=[Depends(rate_limit("login"))])
+    def login(request: Request, user_id: int = 0):
+        if user_id:
+            request.session["user_id"] = user_id
+        return {"ok": True}
+
+    @app.post("/register", dependencies=[Depends(rate_limit("register", low_priority=True))])
+    def register():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_429_with_retry_after_rounded_up(client, clock):
+    assert client.post("/login").status_code == 200
+    assert client.post("/login").status_code == 200
+    response = client.post("/login")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"  # one token every 30 seconds
+    assert response.json() == {"detail": "Too many requests"}
+
+    clock.now += 29.5
+    response = client.post("/login")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"  # 0.5 seconds rounds up
+
+    clock.now += 0.5
+    assert client.post("/login").status_code == 200
+
+
+def test_logged_in_users_have_their_own_bucket(client):
+    assert client.post("/login", params={"user_id": 7}).status_code == 200  # counted against the IP
+    assert client.post("/login").status_code == 200
+    assert client.post("/login").status_code == 200
+    assert client.post("/login").status_code == 429
+
+    anonymous = TestClient(client.app)
+    assert anonymous.post("/login").status_code == 200
+    assert anonymous.post("/login").status_code == 429
+
+
+def test_disabled_rate_limiting_allows_everything(client, monkeypatch):
+    monkeypatch.setattr(rate_limit_module.settings, "RATE_LIMIT_ENABLED", False)
+    assert all(client.post("/register").status_code == 200 for _ in range(5))
+
+
+def test_low_priority_routes_get_503_when_overloaded(client, monkeypatch):
+    monkeypatch.setattr(load_monitor, "loop_lag", 10.0)
+    response = client.post("/register")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    # Interactive routes are only rate limited, never shed
+    assert client.post("/login").status_code == 200
+
+    monkeypatch.setattr(rate_limit_module.settings, "LOAD_SHED_ENABLED", False)
+    assert client.post("/register").status_code == 200
+
+
+def test_shed_requests_do_not_use_up_tokens(client, monkeypatch):
+    monkeypatch.setattr(load_monitor, "in_flight", 10 ** 6)
+    assert client.post("/register").status_code == 503
+    monkeypatch.setattr(load_monitor, "in_flight", 0)
+    assert client.post("/register").status_code == 200
@@ -0,0 +1,132 @@
+"""Routing of ShardedSession statements between the directory and two data shards."""
+import pytest
+from sqlalchemy import event, literal, or_, text
+from app.core.sharding import DIRECTORY
+from app.crud import crud_section
+from app.models.models import Link, Section, User
+
+# user 1 lives on shard_1, user 2 on shard_0 (user_id % 2)
+USER_SHARDS = {1: "shard_1", 2: "shard_0"}
+
+
+@pytest.fixture
+def db(router):
+    session = router.sessionmaker()()
+    session.add_all([User(id=1, email="one@example.com"), User(id=2, email="two@example.com")])
+    session.commit()
+    # Both users get sections 1 and 2 with two links in section 2, so ids collide across shards
+    for user_id in USER_SHARDS:
+        session.add_all([
+            Section(name="Uncategorized", order=0, user_id=user_id),
+            Section(name="Work", order=1, user_id=user_id),
+        ])
+        session.commit()
+        session.add_all([
+            Link(title=f"Link {i}", url=f"https://example.com/{user_id}/{i}", user_id=user_id, section_id=2)
+            for i in range(2)
+        ])
+        session.commit()
+    session.expunge_all()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def queried(router):
+    """Names of the databases that ran a statement, in order."""
+    seen = []
+    engines = {DIRECTORY: router.directory_engine, **router.shard_engines}
+    listeners = []
+    for name, engine in engines.items():
+        def record(*args, name=name):
+            seen.append(name)
+        event.listen(engine, "before_cursor_execute", record)
+        listeners.append((engine, record))
+    yield seen
+    for engine, record in listeners:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def shard_rows(router, shard, sql):
+    with router.shard_engines[shard].connect() as conn:
+        return conn.execute(text(sql)).all()
+
+
+def test_rows_are_written_to_the_owners_shard(router, db):
+    assert shard_rows(router, "shard_1", "SELECT DISTINCT user_id FROM links") == [(1,)]
+    assert shard_rows(router, "shard_0", "SELECT DISTINCT user_id FROM links") == [(2,)]
+    with router.directory_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM users")).scalar() == 2
+
+
+def test_pinned_shard_overrides_modulo(router, db):
+    assert router.shard_for_user(1) == "shard_1"
+    with router.directory_engine.begin() as conn:
+        conn.execute(text("UPDATE users SET shard = 0 WHERE id = 1"))
+    assert router.shard_for_user(1) == "shard_1"  # cached until invalidated
+    router.invalidate(1)
+    assert router.shard_for_user(1) == "shard_0"
+
+
+@pytest.mark.parametrize("criterion", [
+    Link.user_id == 1,
+    literal(1) == Link.user_id,
+    Link.user_id.in_([1]),
+])
+def test_user_filter_reads_one_shard(db, queried, criterion):
+    links = db.query(Link).filter(criterion, Link.section_id == 2).all()
+    assert {link.user_id for link in links} == {1}
+    assert set(queried) == {"shard_1"}
+
+
+def test_filter_on_several_users_reads_their_shards(db, queried):
+    links = db.query(Link).filter(Link.user_id.in_([1, 2])).all()
+    assert len(links) == 4
+    assert set(queried) == {"shard_0", "shard_1"}
+
+
+@pytest.mark.parametrize("criterion", [
+    None,
+    Link.id == 1,
+    or_(Link.user_id == 1, Link.id == 1),
+    Link.user_id != 1,
+])
+def test_other_filters_fan_out(db, queried, criterion):
+    query = db.query(Link)
+    if criterion is not None:
+        query = query.filter(criterion)
+    expected = {link.user_id for link in query.all()}
+    assert set(queried) == {"shard_0", "shard_1"}
+    # The OR must still find user 2's link 1 on the other shard
+    if criterion is not None and "OR" in str(criterion):
+        assert expected == {1, 2}
+
+
+def test_lazy_loads_stay_on_the_parents_shard(db, queried):
+    section = db.query(Section).filter(Section.user_id == 1, Section.id == 2).one()
+    queried.clear()
+    assert {link.user_id for link in section.links} == {1}
+    assert queried == ["shard_1"]
+
+    link = section.links[0]
+    db.expire(link, ["section"])
+    queried.clear()
+    assert link.section.user_id == 1
+    assert set(queried) <= {"shard_1"}
+
+
+def test_lazy_load_from_a_directory_user_uses_its_shard(db, queried):
+    user = db.get(User, 2)
+    queried.clear()
+    assert {link.user_id for link in user.links} == {2}
+    assert queried == ["shard_0"]
+
+
+def test_delete_section_moves_links_on_the_owners_shard_only(router, db):
+    assert crud_section.delete_section(db, 2, 1) is True
+
+    assert shard_rows(router, "shard_1", "SELECT section_id FROM links") == [(1,), (1,)]
+    assert shard_rows(router, "shard_1", "SELECT id FROM sections") == [(1,)]
+    # User 2's section 2 and its links share ids with user 1's but are untouched
+    assert shard_rows(router, "shard_0", "SELECT section_id FROM links") == [(2,), (2,)]
+    assert shard_rows(router, "shard_0", "SELECT id FROM sections ORDER BY id") == [(1,), (2,)]
@@ -0,0 +1,162 @@
+"""The user record cache and the auth dependency built on it."""
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from starlette.middleware.sessions import SessionMiddleware
+from app.core import deps, user_cache as user_cache_module
+from app.core.deps import get_current_user_record
+from app.core.user_cache import UserCache
+from app.crud import crud_user
+from app.models.models import User
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(user_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = UserCache(max_size=10, ttl=60)
+    cache.set(1, {"id": 1})
+    clock.now += 59
+    assert cache.get(1) == {"id": 1}
+    clock.now += 2
+    assert cache.get(1) is None
+    assert len(cache._entries) == 0
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = UserCache(max_size=2, ttl=60)
+    cache.set(1, {"id": 1})
+    cache.set(2, {"id": 2})
+    cache.get(1)  # 2 is now the least recently used
+    cache.set(3, {"id": 3})
+    assert cache.get(2) is None
+    assert cache.get(1) == {"id": 1}
+    assert cache.get(3) == {"id": 3}
+
+
+def test_set_refreshes_the_ttl(clock):
+    cache = UserCache(max_size=10, ttl=60)
+    cache.set(1, {"id": 1, "name": "Old"})
+    clock.now += 50
+    cache.set(1, {"id": 1, "name": "New"})
+    clock.now += 50
+    assert cache.get(1) == {"id": 1, "name": "New"}
+
+
+def test_invalidate(clock):
+    cache = UserCache(max_size=10, ttl=60)
+    for user_id in (1, 2, 3):
+        cache.set(user_id, {"id": user_id})
+    cache.invalidate(1)
+    cache.invalidate(99)
+    assert cache.get(1) is None and cache.get(2) is not None
+    cache.invalidate()
+    assert cache.get(2) is None and cache.get(3) is None
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = UserCache(max_size=10, ttl=60)
+    monkeypatch.setattr(deps, "user_cache", cache)
+    monkeypatch.setattr(crud_user, "user_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="one@example.com", name="One", is_active=True)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def users_queries(engine):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def client(monkeypatch, session_factory, cache, user):
+    monkeypatch.setattr(deps, "ReadSessionLocal", session_factory)
+    app = FastAPI()
+    app.add_middleware(SessionMiddleware, secret_key="test")
+
+    @app.post("/login/{user_id}")
+    def login(user_id: int, request: Request):
+        request.session["user_id"] = user_id
+        return {}
+
+    @app.get("/me")
+    def me(record: dict = Depends(get_current_user_record)):
+        return record
+
+    return TestClient(app)
+
+
+def test_requests_without_a_session_are_401(client):
+    assert client.get("/me").status_code == 401
+
+
+def test_unknown_users_are_401(client):
+    client.post("/login/99")
+    assert client.get("/me").status_code == 401
+
+
+def test_the_users_query_runs_once_per_ttl(client, user, users_queries):
+    client.post(f"/login/{user.id}")
+    for _ in range(3):
+        response = client.get("/me")
+        assert response.json() == {"id": user.id, "email": "one@example.com", "name": "One", "is_active": True}
+    assert len(users_queries) == 1
+
+
+def test_deactivation_takes_effect_immediately(client, db, user, cache):
+    client.post(f"/login/{user.id}")
+    assert client.get("/me").status_code == 200
+    assert cache.get(user.id) is not None
+
+    crud_user.set_user_active(db, user.id, False)
+    assert cache.get(user.id) is None
+    response = client.get("/me")
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Account is inactive"}
+    # The inactive record is cached too, later requests are refused without a query
+    assert cache.get(user.id)["is_active"] is False
+
+    crud_user.set_user_active(db, user.id, True)
+    assert client.get("/me").status_code == 200
+
+
+def test_set_user_active_for_unknown_users(db, cache):
+    assert crud_user.set_user_active(db, 99, False) is None
+
+
+def test_linking_google_refreshes_the_cached_name(client, db, user, cache):
+    client.post(f"/login/{user.id}")
+    assert client.get("/me").json()["name"] == "One"
+
+    crud_user.link_google_account(db, user, "google-123", "One from Google")
+    assert cache.get(user.id) is None
+    assert client.get("/me").json()["name"] == "One from Google"